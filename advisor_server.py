@@ -0,0 +1,221 @@
+"""
+Headless HTTP service for the Brown Course Advisor.
+
+    python3 advisor_server.py --port 8000
+    curl -s localhost:8000/ask -d '{"question": "What intro CS courses are there?"}'
+
+The model and FAISS index load once and are shared by every client. Send the
+returned session_id with follow-up questions to keep the conversation going.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import llm_client
+import prompt_builder
+from conversation_memory import ConversationMemory
+from query import BrownCourseAdvisor, require_api_key
+from query_cache import QUERY_CACHE_PATH
+from response_cache import RESPONSE_CACHE_PATH
+
+
+class SessionStore:
+    """Per-session ConversationMemory, bounded in sessions and in memory per session.
+
+    Past `max_sessions` the least recently used session is dropped, and
+    sessions idle for more than `ttl` seconds expire. Only touched from the
+    event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_sessions=1000, max_turns=prompt_builder.MAX_HISTORY_TURNS, ttl=3600):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.sessions = OrderedDict()
+
+    def history(self, session_id):
+        """(recent turns, summary) for the session; empty for a new or expired session."""
+        entry = self.sessions.get(session_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return [], ""
+        return entry[1].snapshot()
+
+    def append(self, session_id, question, response, course_ids):
+        now = time.monotonic()
+        entry = self.sessions.pop(session_id, None)
+        memory = entry[1] if entry and now - entry[0] <= self.ttl else ConversationMemory(self.max_turns)
+        memory.add(question, response, course_ids)
+        self.sessions[session_id] = (now, memory)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+class AdvisorService:
+    """Serves POST /ask and GET /stats from one shared BrownCourseAdvisor.
+
+    Encoding, search and cache lookups run on a `workers`-thread pool so the
+    event loop stays free; LLM calls are awaited on the loop through the
+    service's own LLMClient, whose limit of `llm_concurrency` requests in
+    flight is the only one (it replaces $LLM_CONCURRENCY here).
+    """
+
+    def __init__(self, advisor, workers=4, max_sessions=1000, llm_concurrency=32, llm_timeout=60):
+        self.advisor = advisor
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="advisor")
+        self.sessions = SessionStore(max_sessions)
+        self.llm = llm_client.LLMClient(max_concurrency=llm_concurrency)
+        self.llm_timeout = llm_timeout
+        self.counts = {"fast": 0, "cache": 0, "llm": 0, "error": 0}
+        # Sizes of the prompts sent to the LLM
+        self.prompt_tokens = {"count": 0, "total": 0, "max": 0}
+
+    def prepare(self, question, history, summary):
+        """Worker-pool half of a question: (answer or None, courses, source, LLM request or None)."""
+        advisor = self.advisor
+        with advisor.tracer.span("fast_path"):
+            fast = advisor.router.route(question)
+        if fast:
+            return fast[0], fast[1], "fast", None
+
+        courses = advisor.retrieve(question)
+        cached, request = advisor.prepare_chat(question, courses, history, summary)
+        if cached is not None:
+            return cached, courses, "cache", None
+        return None, courses, "llm", request
+
+    async def ask(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "expected a JSON body"}, status=400)
+        if not isinstance(body, dict):
+            return web.json_response({"error": "expected a JSON object"}, status=400)
+        question = str(body.get("question") or "").strip()
+        if not question:
+            return web.json_response({"error": "missing 'question'"}, status=400)
+        session_id = str(body.get("session_id") or uuid.uuid4().hex)
+
+        start = time.perf_counter()
+        # Stages run on pool threads and on the loop, so the request carries its own breakdown
+        breakdown = {}
+        try:
+            return await self.respond(question, session_id, breakdown)
+        finally:
+            self.advisor.tracer.finish(breakdown, time.perf_counter() - start)
+
+    async def respond(self, question, session_id, breakdown):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        history, summary = self.sessions.history(session_id)
+
+        def prepare():
+            with self.advisor.tracer.collect(breakdown):
+                return self.prepare(question, history, summary)
+        try:
+            answer, courses, source, llm_request = await loop.run_in_executor(self.pool, prepare)
+        except Exception as e:
+            self.counts["error"] += 1
+            return web.json_response({"session_id": session_id, "error": f"could not answer: {e}"}, status=500)
+
+        if llm_request:
+            try:
+                with self.advisor.tracer.span("llm", breakdown):
+                    answer = await asyncio.wait_for(self.llm.acomplete(llm_request[0]), self.llm_timeout)
+            except llm_client.LLMUnavailable as e:
+                self.counts["error"] += 1
+                return web.json_response({"session_id": session_id, "error": f"LLM unavailable: {e}"},
+                                         status=503)
+            except Exception as e:
+                self.counts["error"] += 1
+                return web.json_response({"session_id": session_id, "error": f"LLM request failed: {e}"},
+                                         status=502)
+            await loop.run_in_executor(self.pool, self.advisor.remember_answer, llm_request, answer)
+            self.prompt_tokens["count"] += 1
+            self.prompt_tokens["total"] += llm_request[3]
+            self.prompt_tokens["max"] = max(self.prompt_tokens["max"], llm_request[3])
+
+        self.counts[source] += 1
+        self.sessions.append(session_id, question, answer, [course['code'] for course in courses])
+        return web.json_response({
+            "session_id": session_id,
+            "answer": answer,
+            "courses": [{"code": course['code'], "title": course['title']} for course in courses],
+            "source": source,
+            "prompt_tokens": llm_request[3] if llm_request else None,
+            "seconds": round(time.perf_counter() - start, 4),
+        })
+
+    async def stats(self, request):
+        prompts = self.prompt_tokens
+        return web.json_response({
+            "sessions": len(self.sessions),
+            "answers": self.counts,
+            "router": self.advisor.router.stats(),
+            "prompt_tokens": dict(prompts, mean=prompts["total"] / max(prompts["count"], 1)),
+            "query_cache": self.advisor.query_cache.stats(),
+            "response_cache": self.advisor.response_cache.stats(),
+            "reranker": self.advisor.reranker.stats() if self.advisor.reranker else None,
+            "stages": self.advisor.tracer.snapshot(),
+            "llm": self.llm.stats(),
+        })
+
+    async def metrics(self, request):
+        """Stage histograms in the Prometheus text format (empty unless $ADVISOR_TRACE is set)."""
+        return web.Response(text=self.advisor.tracer.prometheus(), content_type="text/plain")
+
+    async def close(self, app):
+        self.pool.shutdown(wait=True)
+        await self.llm.aclose()
+        self.advisor.query_cache.save()
+        self.advisor.response_cache.close()
+        self.advisor.tracer.close()
+
+
+def make_app(advisor, **options):
+    service = AdvisorService(advisor, **options)
+    app = web.Application()
+    app.router.add_post("/ask", service.ask)
+    app.router.add_get("/stats", service.stats)
+    app.router.add_get("/metrics", service.metrics)
+    app.on_cleanup.append(service.close)
+    app["service"] = service
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the course advisor over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="threads for encoding, search and cache lookups")
+    parser.add_argument("--max-sessions", type=int, default=1000,
+                        help="conversations kept before the least recently used is dropped")
+    parser.add_argument("--llm-concurrency", type=int, default=32,
+                        help="LLM requests in flight at once (overrides $LLM_CONCURRENCY)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    require_api_key()
+    advisor = BrownCourseAdvisor(query_cache_path=QUERY_CACHE_PATH, response_cache_path=RESPONSE_CACHE_PATH)
+
+    async def build():
+        return make_app(advisor, workers=args.workers, max_sessions=args.max_sessions,
+                        llm_concurrency=args.llm_concurrency)
+
+    print(f"🌐 Serving on http://{args.host}:{args.port} (POST /ask, GET /stats, GET /metrics)")
+    web.run_app(build(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+
+from query import BrownCourseAdvisor, require_api_key
+from query_cache import QUERY_CACHE_PATH
+from response_cache import RESPONSE_CACHE_PATH
+
+
+def read_questions(path, field="question"):
+    """Yield (record, question) for each line of a JSONL file.
+
+    A line is either a JSON string or an object holding the question under
+    `field`; the rest of the object is carried through to the output. Other
+    lines are skipped and reported on stderr with their line number.
+    """
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"⚠️  {path}:{number}: skipped, not JSON ({e})", file=sys.stderr)
+                continue
+            if isinstance(record, str):
+                record = {field: record}
+            if not isinstance(record, dict):
+                print(f"⚠️  {path}:{number}: skipped, expected a string or an object", file=sys.stderr)
+                continue
+            question = record.get(field)
+            if not isinstance(question, str) or not question.strip():
+                print(f"⚠️  {path}:{number}: skipped, no question under {field!r}", file=sys.stderr)
+                continue
+            yield record, question
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the course advisor")
+    parser.add_argument("input", help="JSONL file of questions")
+    parser.add_argument("output", help="JSONL file to write answers and retrieved courses to")
+    parser.add_argument("--field", default="question",
+                        help="key holding the question in each input object")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="questions encoded and searched together")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="concurrent LLM calls")
+    parser.add_argument("--k", type=int, default=3, help="courses retrieved per question")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    require_api_key()
+    advisor = BrownCourseAdvisor(query_cache_path=QUERY_CACHE_PATH, response_cache_path=RESPONSE_CACHE_PATH)
+
+    rows = read_questions(args.input, args.field)
+    totals = {"fast_path": 0.0, "encode": 0.0, "search": 0.0, "llm": 0.0}
+    answered = failed = 0
+    start = time.perf_counter()
+    with open(args.output, 'w') as out:
+        while True:
+            batch = list(itertools.islice(rows, args.batch_size))
+            if not batch:
+                break
+            records = [record for record, _ in batch]
+            results = advisor.advise_many([question for _, question in batch], args.k, args.workers)
+            for i, (record, (advice, courses)) in enumerate(zip(records, results)):
+                record = dict(record, answer=advice, courses=[course['code'] for course in courses])
+                if i in advisor.last_batch_errors:
+                    record["error"] = advisor.last_batch_errors[i]
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            for stage, seconds in advisor.last_batch_timings.items():
+                totals[stage] += seconds
+            answered += len(batch)
+            failed += len(advisor.last_batch_errors)
+            elapsed = time.perf_counter() - start
+            print(f"Answered {answered} questions ({answered / elapsed:.1f}/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {answered} questions in {elapsed:.1f}s ({answered / max(elapsed, 1e-9):.1f} questions/s)")
+    print("   " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in totals.items()))
+    if failed:
+        print(f"   ❌ {failed} questions failed; their output lines carry an \"error\"")
+    stats = advisor.router.stats()
+    print(f"   ⚡ Answered directly: {stats['fast']['count']}, via retrieval + LLM: {stats['llm']['count']}")
+    stats = advisor.response_cache.stats()
+    print(f"   🗂️  Answer cache: {stats['hits']} hits, {stats['misses']} misses")
+    advisor.query_cache.save()
+    advisor.response_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+fp32 PyTorch vs int8 ONNX Runtime embeddings: agreement, query latency and memory.
+
+    python -m benchmarks.bench_backend --min-cosine 0.98 --min-overlap 0.8
+
+Each backend runs in its own subprocess so peak RSS is measured separately.
+Both encode every course and a set of typical questions; the int8 vectors must
+stay within --min-cosine of the fp32 ones, and each question's top-k courses
+must overlap by at least --min-overlap, or the script exits non-zero.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import load_courses
+
+QUESTIONS = [
+    "What intro CS courses are there for someone with no programming experience?",
+    "I want to learn machine learning, what should I take?",
+    "Which courses cover computer security and cryptography?",
+    "What are good theory courses about algorithms and complexity?",
+    "Are there courses on computer graphics or animation?",
+    "I like databases and distributed systems",
+    "Which courses teach operating systems and low-level programming?",
+    "What should I take for a career in data science?",
+    "Courses about programming languages and compilers",
+    "Is there anything on robotics or computer vision?",
+    "What is the best course on software engineering practices?",
+    "I am interested in human-computer interaction and design",
+]
+
+
+def measure(backend, out, repeats):
+    """Subprocess side: load `backend`, encode courses and questions, save vectors and timings."""
+    import embed
+    from embedding_backend import load_model
+
+    start = time.perf_counter()
+    model = load_model(embed.MODEL_NAME, backend)
+    load_s = time.perf_counter() - start
+
+    texts = [embed.course_text(c) for c in load_courses()]
+    start = time.perf_counter()
+    courses = embed.encode_texts(model, texts)
+    courses_s = time.perf_counter() - start
+
+    embed.encode_query(model, QUESTIONS[0])  # warm-up
+    latencies = []
+    for _ in range(repeats):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            embed.encode_query(model, question)
+            latencies.append(time.perf_counter() - start)
+    queries = embed.encode_queries(model, QUESTIONS)
+
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    np.savez(out, courses=courses, queries=queries, latencies=np.array(latencies),
+             load_s=load_s, courses_s=courses_s, rss_mb=rss_mb)
+
+
+def run(backend, repeats):
+    with tempfile.TemporaryDirectory() as directory:
+        out = os.path.join(directory, f"{backend}.npz")
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_backend", "--measure", backend,
+                        "--out", out, "--repeats", str(repeats)], check=True)
+        with np.load(out) as data:
+            return {name: data[name] for name in data.files}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=10, help="passes over the questions for latency")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        measure(args.measure, args.out, args.repeats)
+        return 0
+
+    from embedding_backend import agreement
+
+    results = {backend: run(backend, args.repeats) for backend in ("torch", "onnx-int8")}
+    print(f"{'backend':<10} {'load':>7} {'courses':>8} {'query p50':>10} {'query p99':>10} {'peak RSS':>9}")
+    for backend, r in results.items():
+        latencies = r["latencies"] * 1000
+        print(f"{backend:<10} {float(r['load_s']):6.2f}s {float(r['courses_s']):7.2f}s "
+              f"{np.percentile(latencies, 50):8.2f}ms {np.percentile(latencies, 99):8.2f}ms "
+              f"{float(r['rss_mb']):7.0f}MB")
+
+    reference, candidate = results["torch"], results["onnx-int8"]
+    scores = agreement(reference["courses"], candidate["courses"],
+                       reference["queries"], candidate["queries"], args.k)
+    print(f"cosine agreement: mean {scores['mean_cosine']:.4f}, min {scores['min_cosine']:.4f}; "
+          f"top-{args.k} overlap {scores['topk_overlap']:.1%}")
+    if scores["min_cosine"] < args.min_cosine or scores["topk_overlap"] < args.min_overlap:
+        print(f"❌ int8 vectors drift past the thresholds (cosine >= {args.min_cosine}, "
+              f"overlap >= {args.min_overlap:.0%})")
+        return 1
+    print("✅ int8 vectors agree with fp32")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Memory per session: an unbounded list of turns vs ConversationMemory.
+
+    python -m benchmarks.bench_conversation --turns 2000
+
+Feeds the same long session to both and reports traced memory after each
+--step turns. The list keeps every answer and course record; ConversationMemory
+should level off once its ring buffer and summary are full.
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+from benchmarks.fixtures import load_courses
+from conversation_memory import ConversationMemory
+from prompt_builder import get_encoding
+
+ANSWER = ("Based on your interests, {title} ({code}) is a great fit: it covers the core ideas in depth, "
+          "has weekly problem sets, and pairs well with a project course next semester. ") * 6
+
+
+def session(courses, turns):
+    for t in range(turns):
+        shown = [dict(courses[(t * 3 + j) % len(courses)]) for j in range(3)]
+        question = f"Question {t}: what should I take after {shown[0]['code']} if I liked the projects?"
+        yield question, ANSWER.format(**shown[0]), shown
+
+
+def measure(store, courses, turns, step):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sizes = []
+    for t, (question, answer, shown) in enumerate(session(courses, turns), 1):
+        store(question, answer, shown)
+        if t % step == 0:
+            sizes.append((t, (tracemalloc.get_traced_memory()[0] - base) / 1024))
+    tracemalloc.stop()
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--step", type=int, default=250)
+    args = parser.parse_args(argv)
+    courses = load_courses()
+    get_encoding()  # load the tokenizer up front so it isn't counted as session memory
+
+    history = []
+    unbounded = measure(lambda q, a, shown: history.append({"question": q, "response": a, "courses": shown}),
+                        courses, args.turns, args.step)
+    memory = ConversationMemory()
+    bounded = measure(lambda q, a, shown: memory.add(q, a, [c['code'] for c in shown]),
+                      courses, args.turns, args.step)
+
+    print(f"{'turns':>6} {'list':>10} {'memory':>10}")
+    for (t, a), (_, b) in zip(unbounded, bounded):
+        print(f"{t:>6} {a:8.1f}KB {b:8.1f}KB")
+    print(f"summary: {memory.summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
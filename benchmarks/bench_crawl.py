@@ -0,0 +1,67 @@
+"""
+Serial vs concurrent crawl over the local fixture server.
+
+    python -m benchmarks.bench_crawl --latency 0.05 --workers 8
+
+Both paths must produce identical course records; the speedup is reported.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import scraper
+from crawler import Crawler
+from benchmarks.fixtures import build_pages, load_courses, serve_pages
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_serial(base_url, delay):
+    return scraper.scrape_serially(scraper.get_main_courses(base_url=base_url), delay)
+
+
+def run_concurrent(base_url, workers, rate):
+    crawler = Crawler(workers=workers, rate=rate)
+    try:
+        raw = scraper.get_main_courses(crawler, base_url)
+        return scraper.scrape_concurrently(raw, crawler)
+    finally:
+        crawler.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency (s)")
+    parser.add_argument("--delay", type=float, default=0.0, help="serial-mode pause between pages (s)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="per-host rate limit, 0 = unlimited")
+    parser.add_argument("--limit", type=int, default=None, help="only crawl the first N courses")
+    args = parser.parse_args(argv)
+
+    courses = load_courses()[: args.limit]
+    with serve_pages(build_pages(courses), args.latency) as base_url:
+        serial, serial_s = timed(run_serial, base_url, args.delay)
+        concurrent, concurrent_s = timed(run_concurrent, base_url, args.workers, args.rate)
+
+    print(f"courses:    {len(serial)}")
+    print(f"serial:     {serial_s:.2f}s")
+    print(f"concurrent: {concurrent_s:.2f}s ({args.workers} workers)")
+    print(f"speedup:    {serial_s / concurrent_s:.1f}x")
+
+    if serial != concurrent:
+        print("❌ serial and concurrent crawls produced different courses")
+        return 1
+    print("✅ serial and concurrent crawls match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
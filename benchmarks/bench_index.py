@@ -0,0 +1,104 @@
+"""
+Compare FAISS index types on recall, latency and size.
+
+    python -m benchmarks.bench_index                    # the real course index
+    python -m benchmarks.bench_index --size 100000      # synthetic catalog
+
+For each config reports recall@k against the exact Flat results, p50/p99
+single-query latency, build time and on-disk size.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+import embed
+from index_factory import make_index
+from benchmarks.fixtures import synthetic_queries, synthetic_vectors
+
+CONFIGS = [
+    {"type": "flat"},
+    {"type": "ivf", "nprobe": 1},
+    {"type": "ivf", "nprobe": 8},
+    {"type": "ivf", "nprobe": 32},
+    {"type": "hnsw", "ef_search": 16},
+    {"type": "hnsw", "ef_search": 64},
+    {"type": "ivfpq", "nprobe": 8},
+    {"type": "ivfpq", "nprobe": 32},
+]
+
+
+def load_vectors(size, dimension):
+    if size:
+        return synthetic_vectors(size, dimension)
+    index = faiss.read_index(embed.INDEX_PATH)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def describe(config):
+    return ",".join([config["type"]] + [f"{k}={v}" for k, v in config.items() if k != "type"])
+
+
+def disk_size(index):
+    fd, path = tempfile.mkstemp(suffix=".faiss")
+    os.close(fd)
+    try:
+        faiss.write_index(index, path)
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+
+def measure(config, vectors, queries, truth, k):
+    start = time.perf_counter()
+    index = make_index(vectors, config)
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(ids[0]) & set(expected))
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "config": describe(config),
+        "recall": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "build_s": build_s,
+        "size_mb": disk_size(index) / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=0, help="synthetic catalog size (0 = real index)")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    faiss.omp_set_num_threads(1)  # single-query latency, as the advisor sees it
+    vectors = load_vectors(args.size, args.dimension)
+    queries = synthetic_queries(vectors, args.queries)
+    _, truth = make_index(vectors, {"type": "flat"}).search(queries, args.k)
+
+    print(f"{len(vectors)} vectors, {len(queries)} queries, k={args.k}")
+    print(f"{'config':<28}{'recall@k':>9}{'p50 ms':>9}{'p99 ms':>9}{'build s':>9}{'size MB':>9}")
+    for config in CONFIGS:
+        row = measure(config, vectors, queries, truth, args.k)
+        print(f"{row['config']:<28}{row['recall']:>9.3f}{row['p50_ms']:>9.3f}{row['p99_ms']:>9.3f}"
+              f"{row['build_s']:>9.2f}{row['size_mb']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
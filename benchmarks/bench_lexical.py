@@ -0,0 +1,61 @@
+"""
+Per-query cost of BM25 + reciprocal rank fusion as the catalog grows.
+
+    python -m benchmarks.bench_lexical --scales 1 10 100
+
+Larger catalogs are the real courses replicated under new codes.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import load_courses
+from lexical_index import CANDIDATES, LexicalIndex
+
+QUERIES = [
+    "CSCI1470", "who teaches CSCI1951-C", "cs 0150 prerequisites", "courses taught by Littman",
+    "intro to machine learning", "computer graphics and rendering", "security and cryptography", "theory of computation",
+    "which courses use Python for data science", "distributed systems", "human computer interaction",
+]
+
+
+def scaled_catalog(courses, scale):
+    catalog = []
+    for copy in range(scale):
+        for course in courses:
+            code = course["code"] if copy == 0 else f"{course['code'][:4]}{copy:02d}{course['code'][4:]}"
+            catalog.append(dict(course, code=code))
+    return catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    courses = load_courses()
+    print(f"{'courses':>8}{'build ms':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for scale in args.scales:
+        catalog = scaled_catalog(courses, scale)
+        start = time.perf_counter()
+        index = LexicalIndex(catalog)
+        build_ms = (time.perf_counter() - start) * 1000
+        dense = list(range(CANDIDATES))
+
+        latencies = []
+        for i in range(args.repeat):
+            query = QUERIES[i % len(QUERIES)]
+            start = time.perf_counter()
+            index.hybrid(query, dense)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{len(catalog):>8}{build_ms:>10.1f}{np.percentile(latencies, 50):>9.3f}"
+              f"{np.percentile(latencies, 99):>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Memory of loading the catalog and index: parsed JSON + read_index vs the
+memory-mapped course store + IO_FLAG_MMAP index.
+
+    python -m benchmarks.bench_memory --scale 100 --processes 4 --index flat
+
+Starts --processes advisor-like workers per mode, each loading the catalog and
+index and answering some searches and record lookups. Reports per-process
+private (anonymous) and file-backed RSS, and the total PSS across the workers,
+which counts shared pages once.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_lexical import scaled_catalog
+from benchmarks.fixtures import load_courses, synthetic_queries, synthetic_vectors
+
+MODES = ("json", "mmap")
+
+
+def memory_status(pid="self"):
+    """RssAnon, RssFile (from status) and Pss (from smaps_rollup), in MB."""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                values[line.split(":")[0]] = int(line.split()[1]) / 1024
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                values["Pss"] = int(line.split()[1]) / 1024
+    return values
+
+
+def worker(mode, directory, config):
+    """Load like the advisor does, touch the data, report memory, then wait to be released."""
+    import faiss
+    from course_store import CourseStore
+    from index_factory import apply_search_params, mmap_flag
+
+    before = memory_status()
+    start = time.perf_counter()
+    if mode == "json":
+        with open(os.path.join(directory, "courses.json")) as f:
+            courses = json.load(f)
+        index = faiss.read_index(os.path.join(directory, "index.faiss"))
+    else:
+        courses = CourseStore(os.path.join(directory, "courses.bin"))
+        index = faiss.read_index(os.path.join(directory, "index.faiss"), mmap_flag(config))
+    apply_search_params(index, config)
+    load_s = time.perf_counter() - start
+
+    queries = np.load(os.path.join(directory, "queries.npy"))
+    _, ids = index.search(queries, 3)
+    shown = [courses[int(i)]["title"] for i in ids.ravel() if i >= 0]
+    after = memory_status()
+
+    print(json.dumps({"load_s": load_s, "shown": len(shown),
+                      "anon_mb": after["RssAnon"] - before["RssAnon"],
+                      "file_mb": after["RssFile"] - before["RssFile"]}), flush=True)
+    sys.stdin.read()
+
+
+def prepare(directory, scale, config):
+    import faiss
+    from course_store import write_course_store
+    from index_factory import make_index
+
+    courses = scaled_catalog(load_courses(), scale)
+    with open(os.path.join(directory, "courses.json"), "w") as f:
+        json.dump(courses, f, indent=2)
+    write_course_store(courses, os.path.join(directory, "courses.bin"), os.path.join(directory, "courses.json"))
+    vectors = synthetic_vectors(len(courses))
+    faiss.write_index(make_index(vectors, config), os.path.join(directory, "index.faiss"))
+    np.save(os.path.join(directory, "queries.npy"), synthetic_queries(vectors, 200))
+    return len(courses)
+
+
+def run_mode(mode, directory, processes, config):
+    workers = [subprocess.Popen([sys.executable, "-m", "benchmarks.bench_memory", "--worker", mode,
+                                 "--dir", directory, "--index", config["type"]],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+               for _ in range(processes)]
+    try:
+        reports = [json.loads(w.stdout.readline()) for w in workers]
+        # Every worker is still alive here, so shared pages are split between them
+        pss = sum(memory_status(w.pid)["Pss"] for w in workers)
+    finally:
+        for w in workers:
+            w.stdin.close()
+            w.wait()
+    return reports, pss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="copies of the real catalog")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--index", default="flat", help="index type (flat, hnsw, ivf, ivfpq)")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    config = {"type": args.index}
+
+    if args.worker:
+        worker(args.worker, args.dir, config)
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        count = prepare(directory, args.scale, config)
+        print(f"{count} courses, {args.index} index, {args.processes} processes per mode")
+        print(f"{'mode':<6} {'load':>8} {'private RSS':>12} {'file RSS':>9} {'total PSS':>10}")
+        for mode in MODES:
+            reports, pss = run_mode(mode, directory, args.processes, config)
+            print(f"{mode:<6} {np.mean([r['load_s'] for r in reports]) * 1000:6.1f}ms "
+                  f"{np.mean([r['anon_mb'] for r in reports]):10.1f}MB "
+                  f"{np.mean([r['file_mb'] for r in reports]):7.1f}MB {pss:8.1f}MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
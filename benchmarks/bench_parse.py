@@ -0,0 +1,80 @@
+"""
+Course page parsing: the original per-field soup walks vs extract_course_fields().
+
+    python -m benchmarks.bench_parse [--html-dir saved_pages/] [--repeat 3]
+
+Pages come from --html-dir (*.html files saved from the live site) or, by
+default, the fixture pages rebuilt from data/courses.json. Every page must
+yield identical fields from both extractors.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import scraper
+from benchmarks.fixtures import build_pages, load_courses
+
+
+def original_fields(html):
+    soup = BeautifulSoup(html, "html.parser")
+    fields = {"description": scraper.getDescription(soup)}
+    for field, label in scraper.TABLE_LABELS.items():
+        fields[field] = scraper.get_table_value(label, soup)
+    return fields
+
+
+def load_pages(html_dir):
+    if html_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(html_dir, "*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+        return pages
+    return [page for path, page in build_pages(load_courses()).items() if path != "/courses/"]
+
+
+def throughput(extract, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [extract(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    return results, len(pages) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--html-dir", help="directory of saved course pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.html_dir)
+    if not pages:
+        print("❌ No pages to parse")
+        return 1
+
+    old, old_rate = throughput(original_fields, pages, args.repeat)
+    new, new_rate = throughput(scraper.extract_course_fields, pages, args.repeat)
+
+    print(f"{'pages:':28}{len(pages)}")
+    print(f"{'original (html.parser):':28}{old_rate:.1f} pages/s")
+    print(f"{'single pass (' + scraper.PARSER + '):':28}{new_rate:.1f} pages/s")
+    print(f"{'speedup:':28}{new_rate / old_rate:.1f}x")
+
+    mismatches = [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+    if mismatches:
+        print(f"❌ {len(mismatches)} pages differ, first at index {mismatches[0]}")
+        print(f"   original:    {old[mismatches[0]]}")
+        print(f"   single pass: {new[mismatches[0]]}")
+        return 1
+    print("✅ outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
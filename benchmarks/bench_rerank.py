@@ -0,0 +1,69 @@
+"""
+Cross-encoder re-ranking: added latency and how often it changes the top-k.
+
+    python -m benchmarks.bench_rerank --model cross-encoder/ms-marco-MiniLM-L-6-v2 --budget-ms 150
+
+Loads the advisor as the CLI does, then retrieves every question twice: with
+the plain hybrid ranking and re-ranked from the top --candidates. The first
+pass scores every pair (cold); the second is served from the pair-score cache.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_backend import QUESTIONS
+from reranker import RERANK_BUDGET_MS, RERANK_CANDIDATES, Reranker
+
+
+def run_pass(advisor, k):
+    """Per question: (plain ids, re-ranked ids, plain ms, re-ranked ms)."""
+    results = []
+    for question in QUESTIONS:
+        reranker, advisor.reranker = advisor.reranker, None
+        start = time.perf_counter()
+        plain = [c['code'] for c in advisor.retrieve(question, k)]
+        plain_ms = (time.perf_counter() - start) * 1000
+        advisor.reranker = reranker
+        start = time.perf_counter()
+        reranked = [c['code'] for c in advisor.retrieve(question, k)]
+        results.append((plain, reranked, plain_ms, (time.perf_counter() - start) * 1000))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--budget-ms", type=float, default=RERANK_BUDGET_MS)
+    parser.add_argument("--candidates", type=int, default=RERANK_CANDIDATES)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from query import BrownCourseAdvisor
+    advisor = BrownCourseAdvisor()
+    start = time.perf_counter()
+    advisor.reranker = Reranker(advisor.courses, args.model, args.budget_ms, args.candidates)
+    advisor.reranker.warm_up()
+    print(f"re-ranker loaded in {time.perf_counter() - start:.2f}s, {advisor.reranker.pair_ms:.2f}ms per pair")
+
+    print(f"{'pass':<7} {'plain p50':>10} {'re-ranked p50':>14} {'p99':>9} {'top-k changed':>14}")
+    for name in ("cold", "cached"):
+        results = run_pass(advisor, args.k)
+        plain_ms = [r[2] for r in results]
+        reranked_ms = [r[3] for r in results]
+        changed = np.mean([set(r[0]) != set(r[1]) for r in results])
+        print(f"{name:<7} {np.percentile(plain_ms, 50):8.1f}ms {np.percentile(reranked_ms, 50):12.1f}ms "
+              f"{np.percentile(reranked_ms, 99):7.1f}ms {changed:13.0%}")
+
+    stats = advisor.reranker.stats()
+    print(f"re-ranked {stats['reranked']}, fell back {stats['fallback']} (budget {args.budget_ms:.0f}ms)")
+    for question, (plain, reranked, _, _) in zip(QUESTIONS, results):
+        if plain != reranked:
+            print(f"  {question}\n    {' '.join(plain)} -> {' '.join(reranked)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Load test for advisor_server: concurrent sessions against the local LLM stub.
+
+    python -m benchmarks.bench_server --users 50 --questions 8
+    python -m benchmarks.bench_server --url http://127.0.0.1:8000   # an already running server
+
+Each simulated user opens its own session and asks its questions one after
+another; users run concurrently. Prints p50/p99 latency overall and per answer
+source (fast path, answer cache, LLM) and the request throughput.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+
+import aiohttp
+import numpy as np
+import openai
+from aiohttp import web
+
+from benchmarks.llm_stub import serve_llm_stub
+
+TOPICS = ["machine learning", "computer security", "algorithms", "databases", "graphics", "robotics",
+          "programming languages", "operating systems", "data science", "theory of computation"]
+TEMPLATES = ["What courses should I take for {}?", "I'm interested in {}, any recommendations?",
+             "Which intro course prepares me for {}?", "What should I take after an intro to {}?"]
+FACTUAL = ["Who teaches CSCI1470?", "When does CSCI0150 meet?", "What are the prerequisites for CSCI1670?"]
+
+
+def user_questions(user, count, seed=0):
+    rng = random.Random(seed + user)
+    questions = [template.format(topic) for template, topic in itertools.product(TEMPLATES, TOPICS)]
+    return [rng.choice(FACTUAL) if rng.random() < 0.2 else rng.choice(questions) for _ in range(count)]
+
+
+async def run_user(session, url, questions, results):
+    session_id = None
+    for question in questions:
+        start = time.perf_counter()
+        async with session.post(f"{url}/ask", json={"question": question, "session_id": session_id}) as response:
+            body = await response.json()
+        elapsed = time.perf_counter() - start
+        session_id = body.get("session_id", session_id)
+        results.append((body.get("source", "error"), elapsed))
+
+
+async def load_test(url, users, questions):
+    results = []
+    connector = aiohttp.TCPConnector(limit=users)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_user(session, url, user_questions(user, questions), results)
+                               for user in range(users)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def report(results, elapsed):
+    def line(label, latencies):
+        latencies = np.array(latencies) * 1000
+        return (f"{label:<8} {len(latencies):>6}  p50 {np.percentile(latencies, 50):8.1f} ms  "
+                f"p99 {np.percentile(latencies, 99):8.1f} ms")
+
+    print(line("all", [seconds for _, seconds in results]))
+    for source in ("fast", "cache", "llm", "error"):
+        latencies = [seconds for kind, seconds in results if kind == source]
+        if latencies:
+            print(line(source, latencies))
+    print(f"throughput: {len(results) / elapsed:.1f} requests/s over {elapsed:.1f}s")
+
+
+async def serve_and_test(args):
+    from advisor_server import make_app
+    from query import BrownCourseAdvisor
+
+    advisor = BrownCourseAdvisor()
+    runner = web.AppRunner(make_app(advisor, workers=args.workers, llm_concurrency=args.llm_concurrency))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await load_test(f"http://127.0.0.1:{port}", args.users, args.questions)
+    finally:
+        await runner.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="load-test a running server instead of starting one")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=8, help="questions per user")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--llm-concurrency", type=int, default=32)
+    parser.add_argument("--first-token", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    if args.url:
+        results, elapsed = asyncio.run(load_test(args.url.rstrip("/"), args.users, args.questions))
+    else:
+        with serve_llm_stub(first_token=args.first_token, token_delay=args.token_delay) as api_base:
+            openai.api_base = api_base
+            openai.api_key = "stub"
+            results, elapsed = asyncio.run(serve_and_test(args))
+
+    print(f"{args.users} users x {args.questions} questions")
+    report(results, elapsed)
+    return 1 if any(kind == "error" for kind, _ in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
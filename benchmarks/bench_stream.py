@@ -0,0 +1,47 @@
+"""
+Time to first token: blocking vs streaming completions against the local LLM stub.
+
+    python -m benchmarks.bench_stream --first-token 0.5 --token-delay 0.02
+"""
+
+import argparse
+import sys
+import time
+
+import openai
+
+import llm_client
+from benchmarks.llm_stub import REPLY, serve_llm_stub
+
+MESSAGES = [{"role": "user", "content": "What are good intro CS courses?"}]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--first-token", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    with serve_llm_stub(first_token=args.first_token, token_delay=args.token_delay) as api_base:
+        openai.api_base = api_base
+        openai.api_key = "stub"
+
+        start = time.perf_counter()
+        blocking = llm_client.complete(MESSAGES)
+        blocking_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed, first_token = llm_client.stream(MESSAGES, lambda token: None)
+        streaming_s = time.perf_counter() - start
+
+    print(f"blocking:  first text after {blocking_s:.2f}s (total {blocking_s:.2f}s)")
+    print(f"streaming: first text after {first_token:.2f}s (total {streaming_s:.2f}s)")
+    if blocking != REPLY or streamed.strip() != REPLY:
+        print("❌ streamed reply does not match the blocking reply")
+        return 1
+    print("✅ streamed reply matches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Resilience checks for llm_client against the local stub with injected faults.
+
+    python -m benchmarks.check_llm_client
+
+Each check starts its own stub and LLMClient and covers one behavior:
+retries after 429 and 5xx, giving up, read timeouts, the circuit breaker
+and its half-open trial, the concurrency limit, connection reuse, streaming
+(retried before the first token, failed after a stall mid-stream, not
+retried once cancelled) and the async client.
+Prints one line per check and exits non-zero if any fails.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+import openai
+from openai import error as errors
+
+from benchmarks.llm_stub import REPLY, Faults, serve_llm_stub
+from llm_client import CircuitBreaker, LLMClient, LLMUnavailable
+
+MESSAGES = [{"role": "user", "content": "What are good intro CS courses?"}]
+
+
+def stub(faults, **options):
+    options.setdefault("first_token", 0.0)
+    options.setdefault("token_delay", 0.0)
+    return serve_llm_stub(faults=faults, **options)
+
+
+def use(api_base):
+    openai.api_base, openai.api_key = api_base, "stub"
+
+
+def check_retry_after_429():
+    faults = Faults(fail=2, status=429, retry_after=0.05)
+    client = LLMClient(max_retries=3)
+    with stub(faults) as api_base:
+        use(api_base)
+        answer = client.complete(MESSAGES)
+    assert answer == REPLY, answer
+    assert client.counts["retries"] == 2 and faults.requests == 3, (client.counts, faults.requests)
+    return f"{faults.requests} requests, {client.counts['retries']} retries (Retry-After honored)"
+
+
+def check_retry_after_5xx():
+    faults = Faults(fail=2, status=502)
+    client = LLMClient(max_retries=3)
+    with stub(faults) as api_base:
+        use(api_base)
+        start = time.perf_counter()
+        answer = client.complete(MESSAGES)
+        elapsed = time.perf_counter() - start
+    assert answer == REPLY and faults.requests == 3, faults.requests
+    return f"recovered after 2 x 502 with {elapsed:.2f}s of jittered backoff"
+
+
+def check_gives_up():
+    faults = Faults(fail=100, status=500)
+    client = LLMClient(max_retries=2, breaker=CircuitBreaker(threshold=100))
+    with stub(faults) as api_base:
+        use(api_base)
+        try:
+            client.complete(MESSAGES)
+        except errors.APIError as e:
+            failure = e
+        else:
+            raise AssertionError("expected the 500s to surface")
+    assert faults.requests == 3, faults.requests
+    return f"raised {type(failure).__name__} after {faults.requests} attempts"
+
+
+def check_not_retried():
+    faults = Faults(fail=100, status=400)
+    client = LLMClient(max_retries=3)
+    with stub(faults) as api_base:
+        use(api_base)
+        try:
+            client.complete(MESSAGES)
+        except errors.InvalidRequestError:
+            pass
+    assert faults.requests == 1 and client.breaker.state == "closed", faults.requests
+    return "400 raised at once, breaker untouched"
+
+
+def check_timeout():
+    faults = Faults(stall=1, stall_seconds=3.0)
+    client = LLMClient(read_timeout=0.5, max_retries=1)
+    with stub(faults) as api_base:
+        use(api_base)
+        start = time.perf_counter()
+        answer = client.complete(MESSAGES)
+        elapsed = time.perf_counter() - start
+    assert answer == REPLY and elapsed < 2.5, elapsed
+    return f"stalled request abandoned, retry answered in {elapsed:.2f}s total"
+
+
+def check_circuit_breaker():
+    faults = Faults(fail=3, status=500)
+    client = LLMClient(max_retries=0, breaker=CircuitBreaker(threshold=3, cooldown=0.5))
+    with stub(faults) as api_base:
+        use(api_base)
+        for _ in range(3):
+            try:
+                client.complete(MESSAGES)
+            except errors.APIError:
+                pass
+        assert client.breaker.state == "open", client.breaker.state
+        start = time.perf_counter()
+        try:
+            client.complete(MESSAGES)
+        except LLMUnavailable:
+            rejected_ms = (time.perf_counter() - start) * 1000
+        else:
+            raise AssertionError("expected the open breaker to reject the call")
+        assert faults.requests == 3, faults.requests
+        time.sleep(0.6)
+        answer = client.complete(MESSAGES)
+    assert answer == REPLY and client.breaker.state == "closed", client.breaker.state
+    return f"opened after 3 failures, rejected in {rejected_ms:.2f}ms, closed after a good trial"
+
+
+def check_trial_released():
+    faults = Faults()
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    client = LLMClient(read_timeout=0.2, max_concurrency=1, breaker=breaker)
+    with stub(faults, first_token=1.0) as api_base:
+        use(api_base)
+        # The trial finds no free request slot
+        breaker.failure()
+        time.sleep(0.15)
+        client.slots.acquire()
+        try:
+            client.complete(MESSAGES)
+        except LLMUnavailable:
+            pass
+        client.slots.release()
+        assert breaker.state == "half-open" and not breaker.trial, breaker.state
+
+        # The trial is cancelled by asyncio.wait_for
+        async def cancelled():
+            try:
+                await asyncio.wait_for(client.acomplete(MESSAGES), 0.05)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                await client.aclose()
+        breaker.failure()
+        time.sleep(0.15)
+        asyncio.run(cancelled())
+        assert not breaker.trial, breaker.state
+    return "a trial without a slot or cancelled mid-request lets the next call try again"
+
+
+def check_concurrency_limit():
+    faults = Faults()
+    client = LLMClient(max_concurrency=3)
+    with stub(faults, first_token=0.2) as api_base:
+        use(api_base)
+        threads = [threading.Thread(target=client.complete, args=(MESSAGES,)) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert faults.requests == 12 and faults.max_in_flight <= 3, faults.max_in_flight
+    return f"12 requests from 12 threads, at most {faults.max_in_flight} in flight"
+
+
+def check_connection_reuse():
+    faults = Faults()
+    client = LLMClient()
+    with stub(faults) as api_base:
+        use(api_base)
+        client.install_session()
+        # A new thread per question: without a shared session each opens its own connection
+        for _ in range(10):
+            thread = threading.Thread(target=client.complete, args=(MESSAGES,))
+            thread.start()
+            thread.join()
+    assert len(faults.connections) == 1, faults.connections
+    return f"10 questions on 10 threads used {len(faults.connections)} connection"
+
+
+def check_stream_retry():
+    faults = Faults(fail=1, status=503)
+    client = LLMClient(max_retries=2)
+    tokens = []
+    with stub(faults) as api_base:
+        use(api_base)
+        answer, first_token = client.stream(MESSAGES, tokens.append)
+    assert answer == "".join(tokens) and answer.strip() == REPLY, answer
+    return f"503 before the first token retried; {len(tokens)} tokens delivered once"
+
+
+def check_stream_stall():
+    faults = Faults(stall=1, stall_seconds=2.0, midstream=True)
+    client = LLMClient(read_timeout=0.3, max_retries=2, breaker=CircuitBreaker(threshold=1))
+    tokens = []
+    with stub(faults) as api_base:
+        use(api_base)
+        try:
+            client.stream(MESSAGES, tokens.append)
+        except Exception as e:
+            failure = e
+        else:
+            raise AssertionError("expected the stalled stream to fail")
+    assert faults.requests == 1 and client.counts["failures"] == 1, (faults.requests, client.counts)
+    assert client.breaker.state == "open", client.breaker.state
+    return f"stall after {len(tokens)} token(s) raised {type(failure).__name__}, not retried, counted as a failure"
+
+
+def check_stream_cancel():
+    faults = Faults(fail=100, status=429, retry_after=5)
+    client = LLMClient(max_retries=3)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    with stub(faults) as api_base:
+        use(api_base)
+        start = time.perf_counter()
+        try:
+            client.stream(MESSAGES, lambda token: None, cancel=cancel)
+        except errors.RateLimitError:
+            elapsed = time.perf_counter() - start
+        else:
+            raise AssertionError("expected the 429 to surface")
+    assert faults.requests == 1 and elapsed < 1.0, (faults.requests, elapsed)
+    return f"cancelled during a 5s Retry-After: gave up after {elapsed:.2f}s and {faults.requests} request"
+
+
+def check_async():
+    faults = Faults(fail=2, status=429, retry_after=0.05)
+    client = LLMClient(max_retries=3)
+
+    async def ask():
+        try:
+            return await asyncio.gather(*(client.acomplete(MESSAGES) for _ in range(4)))
+        finally:
+            await client.aclose()
+
+    with stub(faults) as api_base:
+        use(api_base)
+        answers = asyncio.run(ask())
+    assert answers == [REPLY] * 4 and faults.requests == 6, faults.requests
+    return f"4 concurrent requests answered despite 2 x 429 ({faults.requests} requests)"
+
+
+CHECKS = [check_retry_after_429, check_retry_after_5xx, check_gives_up, check_not_retried, check_timeout,
+          check_circuit_breaker, check_trial_released, check_concurrency_limit, check_connection_reuse,
+          check_stream_retry, check_stream_stall, check_stream_cancel, check_async]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help="run only these checks (e.g. timeout circuit_breaker)")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for check in CHECKS:
+        name = check.__name__[len("check_"):]
+        if args.names and name not in args.names:
+            continue
+        try:
+            print(f"✅ {name}: {check()}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
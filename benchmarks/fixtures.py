@@ -0,0 +1,129 @@
+"""
+Offline fixtures for the benchmarks: course pages rebuilt from data/courses.json
+in the same shape as cs.brown.edu, a tiny local server that serves them, and
+synthetic embedding catalogs for index benchmarks at larger sizes.
+"""
+
+import hashlib
+import html
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+COURSES_PATH = "data/courses.json"
+
+
+def load_courses(path=COURSES_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def course_path(course):
+    return "/courses/info/" + course["url"].rstrip("/").rsplit("/", 1)[-1] + "/"
+
+
+def listing_page(courses):
+    rows = "\n".join(
+        f'<tr><td><a href="{course_path(c)}">{html.escape(c["code"])}</a></td>'
+        f'<td>{html.escape(c["title"])}</td></tr>'
+        for c in courses
+    )
+    return (
+        "<html><body><h1>Courses</h1><p>Fall and Spring offerings.</p>"
+        f"<table><tr><th>Course</th><th>Title</th></tr>\n{rows}\n</table></body></html>"
+    )
+
+
+def detail_page(course):
+    parts = [
+        "<html><head><title>", html.escape(course["code"]), "</title></head><body>",
+        "<h1>", html.escape(course["title"]), "</h1>",
+        "<p>Brown University Computer Science</p>",
+    ]
+    if course.get("description", "N/A") != "N/A":
+        parts += ["<p>", html.escape(course["description"]), "</p>"]
+    parts.append("<table>")
+    parts.append("<tr><td>Course:</td><td>" + html.escape(course["code"]) + "</td></tr>")
+    for label, key in (("Instructor(s):", "instructor"), ("Meets:", "meets")):
+        if course.get(key, "N/A") != "N/A":
+            parts.append(f"<tr><td>{label}</td><td>{html.escape(course[key])}</td></tr>")
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+def build_pages(courses):
+    """Map of request path -> html for the listing and every course page."""
+    pages = {"/courses/": listing_page(courses)}
+    for course in courses:
+        pages[course_path(course)] = detail_page(course)
+    return pages
+
+
+@contextmanager
+def serve_pages(pages, latency=0.0):
+    """Serve `pages` on localhost, sleeping `latency` seconds per request.
+
+    Pages carry an ETag and answer If-None-Match with 304, like the real site
+    would for an unchanged page. Yields the base url to use in place of
+    scraper.BASE_URL.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = pages.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            etag = '"%s"' % hashlib.sha1(data).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def synthetic_vectors(count, dimension=384, clusters=None, seed=0):
+    """Normalized float32 vectors grouped around topic centroids, like course embeddings."""
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(1, int(np.sqrt(count)))
+    centroids = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, count)]
+    vectors += 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def synthetic_queries(vectors, count, noise=0.3, seed=1):
+    """Queries near existing vectors, standing in for questions about real courses."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), count)].copy()
+    queries += noise * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
@@ -0,0 +1,188 @@
+"""
+A local stand-in for the OpenAI chat completions endpoint.
+
+    python -m benchmarks.llm_stub --port 8765 --first-token 0.5 --token-delay 0.02
+    OPENAI_API_BASE=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub python3 query.py
+
+Answers POST /v1/chat/completions with a canned reply, either as one JSON body
+or, for "stream": true, as server-sent event chunks, with configurable latency.
+A Faults plan makes it fail (HTTP errors) or stall requests, and records
+concurrency and connection use, for exercising llm_client's resilience.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("Based on your interests, CSCI0150 and CSCI0170 are strong introductory choices. "
+         "CSCI0150 focuses on object-oriented programming in Java, while CSCI0170 covers "
+         "functional programming and data structures. Both prepare you for CSCI0200.")
+
+
+class Faults:
+    """What the stub should get wrong, and what it saw.
+
+    The next `fail` requests get HTTP `status`, then the next `stall` requests
+    hang for `stall_seconds` before answering (with `midstream`, streams hang
+    after their first token instead); after that each request fails
+    with probability `fail_rate`. Counts requests, the most handled at once and
+    the client connections (host, port) used.
+    """
+
+    def __init__(self, fail=0, status=429, stall=0, stall_seconds=60.0, midstream=False, fail_rate=0.0,
+                 retry_after=None, seed=0):
+        self.fail = fail
+        self.status = status
+        self.stall = stall
+        self.stall_seconds = stall_seconds
+        self.midstream = midstream
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    def start(self, client_address):
+        """Register a request; returns ("fail", status), ("stall", seconds) or None."""
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.connections.add(client_address)
+            if self.fail > 0:
+                self.fail -= 1
+                return "fail", self.status
+            if self.stall > 0:
+                self.stall -= 1
+                return "stall", self.stall_seconds
+            if self.fail_rate and self.rng.random() < self.fail_rate:
+                return "fail", self.status
+            return None
+
+    def finish(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+def make_handler(reply=REPLY, first_token=0.2, token_delay=0.01, faults=None):
+    tokens = [word + " " for word in reply.split(" ")]
+    faults = faults or Faults()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            fault = faults.start(self.client_address)
+            try:
+                self.answer(fault)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up on a stalled request
+            finally:
+                faults.finish()
+
+        def answer(self, fault):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if fault and fault[0] == "fail":
+                self.send_json({"error": {"message": f"injected failure ({fault[1]})", "type": "stub_error",
+                                          "param": None, "code": None}}, fault[1])
+                return
+            stall = fault[1] if fault and fault[0] == "stall" else 0
+            if not (faults.midstream and request.get("stream")):
+                time.sleep(stall)
+                stall = 0
+            time.sleep(first_token)
+            if request.get("stream"):
+                self.send_stream(request, stall)
+            else:
+                time.sleep(token_delay * len(tokens))
+                self.send_json({
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": reply}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+                })
+
+        def send_json(self, body, status=200):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            if status == 429 and faults.retry_after is not None:
+                self.send_header("Retry-After", str(faults.retry_after))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_stream(self, request, stall=0):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(stall if i == 1 else token_delay)
+                self.send_event({
+                    "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                })
+            self.send_chunk(b"data: [DONE]\n\n")
+            self.send_chunk(b"")
+
+        def send_event(self, body):
+            self.send_chunk(b"data: " + json.dumps(body).encode("utf-8") + b"\n\n")
+
+        def send_chunk(self, data):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@contextmanager
+def serve_llm_stub(port=0, **options):
+    """Run the stub in a background thread; yields its api_base (".../v1")."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**options))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=429, help="HTTP status of injected failures")
+    args = parser.parse_args(argv)
+
+    faults = Faults(status=args.fail_status, fail_rate=args.fail_rate)
+    with serve_llm_stub(args.port, first_token=args.first_token, token_delay=args.token_delay,
+                        faults=faults) as api_base:
+        print(f"LLM stub listening on {api_base} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
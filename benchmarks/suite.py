@@ -0,0 +1,229 @@
+"""
+End-to-end benchmark suite: page parsing, encoding, FAISS search and ask_question, written to JSON.
+
+    python -m benchmarks.suite --out benchmarks/results.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --tolerance 0.2
+    python -m benchmarks.suite --stages parse,search --sizes 1000,10000
+
+Runs offline: course pages come from the fixtures, search runs on synthetic
+catalogs of --sizes courses, and ask_question talks to the local LLM stub.
+Every metric records whether higher or lower is better; with --compare the
+run exits non-zero when any metric is worse than the baseline by more than
+--tolerance (a fraction). --results compares an earlier run instead of
+running again.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.bench_backend import QUESTIONS
+from benchmarks.bench_parse import load_pages
+from benchmarks.fixtures import load_courses, synthetic_queries, synthetic_vectors
+from benchmarks.llm_stub import serve_llm_stub
+
+STAGES = ("parse", "encode", "search", "advise")
+SIZES = (1000, 10000, 100000)
+# Differences smaller than this are timer noise, whatever the relative change
+NOISE_FLOOR = {"ms": 0.05, "s": 0.005}
+
+
+def metric(value, unit, better):
+    return {"value": round(float(value), 4), "unit": unit, "better": better}
+
+
+def percentiles(name, seconds):
+    values = np.array(seconds) * 1000
+    return {f"{name}_p50_ms": metric(np.percentile(values, 50), "ms", "lower"),
+            f"{name}_p99_ms": metric(np.percentile(values, 99), "ms", "lower")}
+
+
+def best_rate(run, count, repeat):
+    """Items per second over the fastest of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def bench_parse(args):
+    import scraper
+    pages = load_pages(args.html_dir)
+    rate = best_rate(lambda: [scraper.extract_course_fields(page) for page in pages], len(pages), args.repeat)
+    return {"pages": metric(len(pages), "pages", "info"),
+            "pages_per_s": metric(rate, "pages/s", "higher")}
+
+
+def bench_encode(args):
+    import embed
+    from embedding_backend import load_model
+    model = load_model(embed.MODEL_NAME, args.backend)
+    texts = [embed.course_text(c) for c in load_courses()]
+    embed.encode_queries(model, QUESTIONS)  # warm-up
+    rate = best_rate(lambda: embed.encode_texts(model, texts), len(texts), args.repeat)
+    latencies = []
+    for question in QUESTIONS * args.repeat:
+        start = time.perf_counter()
+        embed.encode_query(model, question)
+        latencies.append(time.perf_counter() - start)
+    return dict({"courses_per_s": metric(rate, "courses/s", "higher")}, **percentiles("query", latencies))
+
+
+def bench_search(args):
+    from index_factory import make_index
+    from lexical_index import CANDIDATES
+    config = {"type": args.index}
+    results = {}
+    for size in args.sizes:
+        vectors = synthetic_vectors(size)
+        start = time.perf_counter()
+        index = make_index(vectors, config)
+        results[f"{size}.build_s"] = metric(time.perf_counter() - start, "s", "lower")
+        queries = synthetic_queries(vectors, args.queries)
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query[None, :], CANDIDATES)
+            latencies.append(time.perf_counter() - start)
+        results.update({f"{size}.{name}": value for name, value in percentiles("search", latencies).items()})
+        del index, vectors
+    return results
+
+
+def bench_advise(args):
+    """ask_question() end to end; a fresh answer cache per pass so every question reaches the stub."""
+    import openai
+    from query import BrownCourseAdvisor
+    from response_cache import ResponseCache
+
+    with serve_llm_stub(first_token=args.first_token, token_delay=args.token_delay) as api_base:
+        openai.api_base, openai.api_key = api_base, "stub"
+        start = time.perf_counter()
+        advisor = BrownCourseAdvisor()
+        load_s = time.perf_counter() - start
+        advisor.ask_question(QUESTIONS[0])  # warm-up
+        retrieve, total = [], []
+        untimed = advisor.retrieve
+
+        def timed_retrieve(*a, **kw):
+            start = time.perf_counter()
+            courses = untimed(*a, **kw)
+            retrieve.append(time.perf_counter() - start)
+            return courses
+        advisor.retrieve = timed_retrieve
+
+        for _ in range(args.repeat):
+            advisor.response_cache = ResponseCache()
+            advisor.conversation_history.clear()
+            for question in QUESTIONS:
+                start = time.perf_counter()
+                advisor.ask_question(question)
+                total.append(time.perf_counter() - start)
+    return dict({"load_s": metric(load_s, "s", "lower")},
+                **percentiles("retrieve", retrieve), **percentiles("ask", total))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    benches = {"parse": bench_parse, "encode": bench_encode, "search": bench_search, "advise": bench_advise}
+    metrics = {}
+    for stage in args.stages:
+        print(f"⏱️  {stage}...")
+        for name, value in benches[stage](args).items():
+            metrics[f"{stage}.{name}"] = value
+    return {
+        "meta": {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "index": args.index, "backend": args.backend,
+                 "llm_stub": {"first_token": args.first_token, "token_delay": args.token_delay}},
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print each shared metric against the baseline; returns the names of the regressions."""
+    regressions = []
+    print(f"{'metric':<34} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or current["better"] == "info" or not base["value"]:
+            continue
+        change = current["value"] / base["value"] - 1
+        noise = abs(current["value"] - base["value"]) < NOISE_FLOOR.get(current["unit"], 0)
+        worse = not noise and (change < -tolerance if current["better"] == "higher" else change > tolerance)
+        better = not noise and (change > tolerance if current["better"] == "higher" else change < -tolerance)
+        flag = "❌" if worse else ("✅" if better else "")
+        print(f"{name:<34} {base['value']:>12.3f} {current['value']:>12.3f} {change:>+8.1%} "
+              f"{current['unit']} {flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results):
+    for name, m in results["metrics"].items():
+        print(f"{name:<34} {m['value']:>12.3f} {m['unit']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="synthetic catalog sizes for search")
+    parser.add_argument("--index", default="flat", help="index type for search (flat, hnsw, ivf, ivfpq)")
+    parser.add_argument("--backend", default="torch", help="embedding backend for encode (torch, onnx-int8)")
+    parser.add_argument("--html-dir", help="saved course pages to parse instead of the fixtures")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200, help="search queries per catalog size")
+    parser.add_argument("--first-token", type=float, default=0.05, help="stub LLM seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="stub LLM seconds between tokens")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--results", help="compare this earlier results JSON instead of running")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown")
+    args = parser.parse_args(argv)
+    args.stages = [stage for stage in args.stages.split(",") if stage]
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    if args.results:
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        results = run_suite(args)
+        print_results(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
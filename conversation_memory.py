@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict, deque
+
+from prompt_builder import MAX_HISTORY_TURNS, count_tokens, truncate_tokens
+
+# Recent turns kept verbatim may use this many tokens; older turns are folded into the summary
+MEMORY_TOKEN_BUDGET = 800
+MAX_RESPONSE_TOKENS = 250
+SUMMARY_TOKENS = 150
+SUMMARY_QUESTION_WORDS = 20
+SUMMARY_COURSES = 12
+
+
+class ConversationMemory:
+    """Bounded conversation history for one session.
+
+    Recent turns live in a ring buffer of at most `max_turns` entries, each
+    holding the question, the answer cut to `max_response_tokens` and the codes
+    of the courses shown (not the course records). When the buffer is full or
+    its turns exceed `token_budget` tokens, the oldest turn is folded into a
+    running summary of earlier questions and courses, kept under
+    `summary_tokens`. Memory per session stays constant however long it runs.
+    """
+
+    def __init__(self, max_turns=MAX_HISTORY_TURNS, token_budget=MEMORY_TOKEN_BUDGET,
+                 max_response_tokens=MAX_RESPONSE_TOKENS, summary_tokens=SUMMARY_TOKENS):
+        self.recent = deque(maxlen=max_turns)
+        self.token_budget = token_budget
+        self.max_response_tokens = max_response_tokens
+        self.summary_tokens = summary_tokens
+        self.earlier_questions = deque()
+        self.earlier_courses = OrderedDict()
+        self.summary = ""
+        self.total_turns = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        """Turns added over the whole session, including summarized ones."""
+        return self.total_turns
+
+    def add(self, question, response, course_ids):
+        """Remember one exchange; `course_ids` are the codes of the courses shown."""
+        response = truncate_tokens(response, self.max_response_tokens)
+        turn = {"question": question, "response": response, "courses": list(course_ids),
+                "tokens": count_tokens(question) + count_tokens(response)}
+        with self.lock:
+            if self.recent.maxlen == 0:
+                self.fold(turn)
+            else:
+                if len(self.recent) == self.recent.maxlen:
+                    self.fold(self.recent.popleft())
+                self.recent.append(turn)
+                while len(self.recent) > 1 and sum(t["tokens"] for t in self.recent) > self.token_budget:
+                    self.fold(self.recent.popleft())
+            self.total_turns += 1
+
+    def fold(self, turn):
+        """Move a turn out of the ring buffer and into the running summary."""
+        words = turn["question"].split()
+        question = " ".join(words[:SUMMARY_QUESTION_WORDS]) + ("..." if len(words) > SUMMARY_QUESTION_WORDS else "")
+        self.earlier_questions.append(question)
+        for code in turn["courses"]:
+            self.earlier_courses.pop(code, None)
+            self.earlier_courses[code] = None
+        while len(self.earlier_courses) > SUMMARY_COURSES:
+            self.earlier_courses.popitem(last=False)
+        self.summary = self.render()
+        while count_tokens(self.summary) > self.summary_tokens and len(self.earlier_questions) > 1:
+            self.earlier_questions.popleft()
+            self.summary = self.render()
+
+    def render(self):
+        summary = "Earlier in this conversation the student asked: " + "; ".join(f'"{q}"' for q in self.earlier_questions) + "."
+        if self.earlier_courses:
+            summary += " Courses already discussed: " + ", ".join(self.earlier_courses) + "."
+        return summary
+
+    def snapshot(self):
+        """(recent turns oldest first, summary), read together, for prompt_builder.build_messages."""
+        with self.lock:
+            return list(self.recent), self.summary
+
+    def clear(self):
+        with self.lock:
+            self.recent.clear()
+            self.earlier_questions.clear()
+            self.earlier_courses.clear()
+            self.summary = ""
+            self.total_turns = 0
@@ -0,0 +1,141 @@
+import re
+from collections import defaultdict
+
+import faiss
+import numpy as np
+
+MEETS_PATTERN = re.compile(r"^(?P<days>(?:Th|Su|Sa|M|T|W|F)+)\s+(?P<hour>\d{1,2})(?::(?P<minute>\d\d))?(?P<ampm>am|pm)")
+DAY_CODES = re.compile(r"Th|Su|Sa|M|T|W|F")
+DAY_NAMES = {"monday": "M", "tuesday": "T", "wednesday": "W", "thursday": "Th", "friday": "F"}
+LEVEL_PATTERN = re.compile(r"\b(\d)000[\s-]*level\b")
+SCHEDULE_PATTERN = re.compile(r"\b((?:Th|M|T|W|F){2,})\b")
+# Surnames like "Sun" or "Savage" are also words, so they need a capital or a cue like "taught by"
+INSTRUCTOR_CUE = re.compile(r"\b(?:by|professor|prof\.?|instructor|with)\s+$", re.IGNORECASE)
+TIMES_OF_DAY = {"morning": (0, 12 * 60), "afternoon": (12 * 60, 17 * 60), "evening": (17 * 60, 24 * 60)}
+
+
+def course_level(code):
+    match = re.search(r"(\d{4})", code or "")
+    return int(match.group(1)) // 1000 * 1000 if match else None
+
+
+def parse_meets(meets):
+    """("MWF 2pm-2:50pm in ...") -> ({"M", "W", "F"}, 840), or (None, None) if unscheduled."""
+    match = MEETS_PATTERN.match((meets or "").strip())
+    if not match:
+        return None, None
+    hour = int(match.group("hour")) % 12 + (12 if match.group("ampm") == "pm" else 0)
+    return frozenset(DAY_CODES.findall(match.group("days"))), hour * 60 + int(match.group("minute") or 0)
+
+
+class CourseFilters:
+    """Structured field indexes (level, instructor, meeting days and start time) over the courses.
+
+    parse() pulls constraints out of a question; select() turns them into the
+    set of allowed course ids, which filtered_search() hands to FAISS so the
+    restriction happens during the search rather than after it.
+    """
+
+    def __init__(self, courses):
+        self.by_level = defaultdict(set)
+        self.by_instructor = defaultdict(set)
+        self.by_days = defaultdict(set)
+        self.start_times = {}
+
+        for doc_id, course in enumerate(courses):
+            level = course_level(course.get("code"))
+            if level is not None:
+                self.by_level[level].add(doc_id)
+            for name in re.split(r"\s*\n\s*", course.get("instructor") or ""):
+                words = name.replace(".", "").split()
+                if len(words) >= 2 and len(words[-1]) >= 3:
+                    self.by_instructor[words[-1].lower()].add(doc_id)
+            days, start = parse_meets(course.get("meets"))
+            if days:
+                self.by_days[days].add(doc_id)
+                self.start_times[doc_id] = start
+
+    def parse(self, question):
+        """Constraints named in the question, e.g. {"level": 1000, "instructor": "littman", "days": {...}}."""
+        filters = {}
+        lowered = question.lower()
+
+        match = LEVEL_PATTERN.search(lowered)
+        if match:
+            filters["level"] = int(match.group(1)) * 1000
+        elif re.search(r"\bgrad(uate)?\b", lowered) and "undergrad" not in lowered:
+            filters["level"] = "graduate"
+
+        for match in re.finditer(r"[A-Za-z]+", question):
+            word = match.group(0)
+            cued = INSTRUCTOR_CUE.search(question[:match.start()])
+            if word.lower() in self.by_instructor and (word[0].isupper() or cued):
+                filters["instructor"] = word.lower()
+                break
+
+        match = SCHEDULE_PATTERN.search(question)
+        if match:
+            filters["days"] = frozenset(DAY_CODES.findall(match.group(1)))
+            filters["exact_days"] = True
+        else:
+            days = {code for name, code in DAY_NAMES.items() if name in lowered}
+            if days:
+                filters["days"] = frozenset(days)
+
+        for name in TIMES_OF_DAY:
+            if name in lowered:
+                filters["time_of_day"] = name
+        return filters
+
+    def select(self, filters):
+        """Course ids satisfying every filter, or None when there are no filters."""
+        if not filters:
+            return None
+        allowed = None
+
+        def narrow(ids):
+            nonlocal allowed
+            allowed = set(ids) if allowed is None else allowed & ids
+
+        if filters.get("level") == "graduate":
+            narrow(set().union(*(ids for level, ids in self.by_level.items() if level >= 2000)))
+        elif "level" in filters:
+            narrow(self.by_level.get(filters["level"], set()))
+        if "instructor" in filters:
+            narrow(self.by_instructor[filters["instructor"]])
+        if "days" in filters:
+            wanted = filters["days"]
+            exact = filters.get("exact_days")
+            narrow(set().union(*(ids for days, ids in self.by_days.items()
+                                 if (days == wanted if exact else wanted <= days))))
+        if "time_of_day" in filters:
+            low, high = TIMES_OF_DAY[filters["time_of_day"]]
+            narrow({doc_id for doc_id, start in self.start_times.items() if low <= start < high})
+        return allowed
+
+
+def filtered_search(index, vector, k, allowed):
+    """FAISS search restricted to `allowed` ids through an IDSelector.
+
+    Approximate indexes can come back short when few allowed vectors sit in the
+    visited clusters / graph neighbourhood; those retry with an exhaustive probe.
+    """
+    ids = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+    selector = faiss.IDSelectorBatch(ids)
+    base = faiss.downcast_index(index)
+    ivf = faiss.try_extract_index_ivf(base)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=faiss.downcast_index(ivf).nprobe)
+    elif isinstance(base, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+
+    scores, indices = index.search(vector, k, params=params)
+    if (indices[0] >= 0).sum() < min(k, len(ids)):
+        if ivf is not None:
+            params.nprobe = ivf.nlist
+        elif isinstance(base, faiss.IndexHNSW):
+            params.efSearch = max(base.hnsw.efSearch, len(ids), k) * 4
+        scores, indices = index.search(vector, k, params=params)
+    return scores, indices
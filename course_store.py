@@ -0,0 +1,159 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+COURSES_PATH = "data/courses.json"
+COURSE_STORE_PATH = "data/courses.bin"
+MAGIC = b"BCS2"
+# How each value is stored: absent from the record, a UTF-8 string, or any other JSON value
+ABSENT, TEXT, JSON = 0, 1, 2
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_course_store(courses, path=COURSE_STORE_PATH, courses_path=None, fields=None):
+    """Write courses as one binary file: a JSON header, an offset table and one UTF-8 column per field.
+
+    Layout: MAGIC, header length (uint32), header, padding to 8 bytes, then a
+    uint64 offset table of shape (fields, count + 1), a uint8 table of value
+    kinds of shape (fields, count) padded to 8 bytes, and the column bytes.
+    `fields` defaults to every key found in the records, in first-seen order;
+    keys a record lacks stay absent when it is read back. The header records
+    the fields and the courses.json it was built from. Written to a temporary
+    file and renamed, so processes that have the old store mapped keep reading it.
+    """
+    if fields is None:
+        fields = list(dict.fromkeys(key for course in courses for key in course))
+    columns = []
+    offsets = np.zeros((len(fields), len(courses) + 1), dtype=np.uint64)
+    kinds = np.zeros((len(fields), len(courses)), dtype=np.uint8)
+    position = 0
+    for f, field in enumerate(fields):
+        offsets[f, 0] = position
+        for i, course in enumerate(courses):
+            if field not in course:
+                value = b""
+            elif isinstance(course[field], str):
+                kinds[f, i] = TEXT
+                value = course[field].encode('utf-8')
+            else:
+                kinds[f, i] = JSON
+                value = json.dumps(course[field]).encode('utf-8')
+            columns.append(value)
+            position += len(value)
+            offsets[f, i + 1] = position
+
+    header = {"fields": list(fields), "count": len(courses)}
+    if courses_path:
+        header["source"] = dict(source_stamp(courses_path), sha256=file_sha256(courses_path))
+    header = json.dumps(header).encode('utf-8')
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % 8)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(offsets.tobytes())
+        f.write(kinds.tobytes() + b"\0" * (-kinds.nbytes % 8))
+        for value in columns:
+            f.write(value)
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"{path} is not a course store")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+    header["offsets_at"] = (8 + length + 7) // 8 * 8
+    return header
+
+
+class CourseStore(Sequence):
+    """Read-only, memory-mapped view of a course store written by write_course_store().
+
+    Behaves like the list of course dicts from courses.json, but a record is
+    only decoded when it is accessed, and the bytes live in the page cache, so
+    every advisor process on the host shares one copy.
+    """
+
+    def __init__(self, path=COURSE_STORE_PATH):
+        header = read_header(path)
+        self.path = path
+        self.fields = header["fields"]
+        self.count = header["count"]
+        self.field_index = {field: f for f, field in enumerate(self.fields)}
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = np.frombuffer(self.buffer, dtype=np.uint64, count=len(self.fields) * (self.count + 1),
+                                     offset=header["offsets_at"]).reshape(len(self.fields), self.count + 1)
+        kinds_at = header["offsets_at"] + self.offsets.nbytes
+        self.kinds = np.frombuffer(self.buffer, dtype=np.uint8, count=len(self.fields) * self.count,
+                                   offset=kinds_at).reshape(len(self.fields), self.count)
+        self.data_at = kinds_at + (self.kinds.nbytes + 7) // 8 * 8
+
+    def __len__(self):
+        return self.count
+
+    def value(self, i, field, default=None):
+        """One field of one course, decoded without touching the rest of the record; `default` if absent."""
+        f = self.field_index.get(field)
+        kind = self.kinds[f, i] if f is not None else ABSENT
+        if kind == ABSENT:
+            return default
+        row = self.offsets[f]
+        text = self.buffer[self.data_at + int(row[i]):self.data_at + int(row[i + 1])].decode('utf-8')
+        return text if kind == TEXT else json.loads(text)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("course index out of range")
+        return {field: self.value(i, field) for f, field in enumerate(self.fields) if self.kinds[f, i] != ABSENT}
+
+    def column(self, field):
+        return [self.value(i, field) for i in range(self.count)]
+
+
+def store_is_fresh(courses_path=COURSES_PATH, path=COURSE_STORE_PATH):
+    """True if the store exists and was built from the current courses.json (stat first, hash on mismatch)."""
+    if not os.path.exists(path):
+        return False
+    try:
+        source = read_header(path).get("source")
+    except ValueError:
+        return False
+    if not source:
+        return False
+    stamp = source_stamp(courses_path)
+    if stamp["size"] == source["size"] and stamp["mtime_ns"] == source["mtime_ns"]:
+        return True
+    return stamp["size"] == source["size"] and file_sha256(courses_path) == source["sha256"]
+
+
+def load_courses(courses_path=COURSES_PATH, path=COURSE_STORE_PATH):
+    """The catalog as a memory-mapped CourseStore, rebuilt from courses.json when that has changed."""
+    if not store_is_fresh(courses_path, path):
+        with open(courses_path, 'r') as f:
+            write_course_store(json.load(f), path, courses_path)
+    return CourseStore(path)
@@ -1,25 +1,221 @@
-print("Running embed.py")
+import argparse
+import hashlib
 import json
-from sentence_transformers import SentenceTransformer
+import os
+import time
+
 import faiss
 import numpy as np
-print("Loading courses...")
-with open('data/courses.json', 'r') as f:
-    courses = json.load(f)
-print("Loading embedding model...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-texts = [f"{c['code']} - {c['title']}: {c['description']} Instructor: {c['instructor']}" for c in courses]
-
-embeddings = model.encode(texts)
-print("Creating embeddings...")
-dimension = embeddings.shape[1]
-
-index = faiss.IndexFlatL2(dimension)
-
-index.add(np.array(embeddings))
-print("Building FAISS index...")
-faiss.write_index(index, 'data/course_index.faiss') 
-print("Saving metadata...")
-with open('data/course_index.json', 'w') as f: 
-    json.dump(courses, f)
-print("All files saved.")
\ No newline at end of file
+
+from course_store import COURSES_PATH, file_sha256, load_courses, source_stamp
+from embedding_backend import BACKENDS, EMBED_BACKEND, load_model
+from embedding_store import EmbeddingStore
+from index_factory import INDEX_TYPES, apply_search_params, make_index, mmap_flag, resolve_config
+
+INDEX_PATH = 'data/course_index.faiss'
+MANIFEST_PATH = 'data/course_index.manifest.json'
+MODEL_NAME = 'all-MiniLM-L6-v2'
+# Vectors are L2-normalized, so inner product == cosine similarity
+METRIC = 'ip'
+BATCH_SIZE = 64
+
+
+def course_text(c):
+    return f"{c['code']} - {c['title']}: {c['description']} Instructor: {c['instructor']}"
+
+
+def encode_texts(model, texts, batch_size=BATCH_SIZE, sort_by_length=True, processes=0):
+    """Encode texts into normalized float32 vectors, printing throughput.
+
+    Sorting by length keeps similarly sized texts in the same batch so little
+    time goes to padding; with `processes` > 1 the batches are spread over a
+    SentenceTransformer multi-process pool.
+    """
+    start = time.perf_counter()
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i])) if sort_by_length else list(range(len(texts)))
+    ordered = [texts[i] for i in order]
+
+    if processes > 1:
+        pool = model.start_multi_process_pool(target_devices=['cpu'] * processes)
+        try:
+            vectors = model.encode(ordered, pool=pool, batch_size=batch_size, normalize_embeddings=True,
+                                   convert_to_numpy=True)
+        finally:
+            model.stop_multi_process_pool(pool)
+    else:
+        vectors = model.encode(ordered, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True)
+
+    embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+    embeddings[order] = vectors
+    elapsed = time.perf_counter() - start
+    print(f"Encoded {len(texts)} texts in {elapsed:.2f}s ({len(texts) / max(elapsed, 1e-9):.1f} texts/s, "
+          f"batch size {batch_size}, {max(processes, 1)} process(es))")
+    return embeddings
+
+
+def encode_query(model, question):
+    """Encode one question the same way the courses were encoded: a normalized float32 row."""
+    return encode_queries(model, [question])
+
+
+def encode_queries(model, questions, batch_size=BATCH_SIZE):
+    """Encode several questions in one batched forward pass: an (n, d) normalized float32 matrix."""
+    vectors = model.encode(list(questions), batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def model_id(model):
+    """Model name plus embedding backend, e.g. "all-MiniLM-L6-v2@onnx-int8"."""
+    return getattr(model, "embedding_id", MODEL_NAME)
+
+
+def embed_courses(courses, model, store=None, **encode_options):
+    """Embed every course, reusing stored vectors for courses whose text is unchanged."""
+    store = store or EmbeddingStore(model_id(model))
+    embeddings = store.encode([course_text(c) for c in courses],
+                              lambda texts: encode_texts(model, texts, **encode_options))
+    # Vectors cached before normalization was introduced are normalized here
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+
+def build_index(embeddings, index_config=None):
+    """Exact inner-product search by default; see index_factory for IVF/HNSW/IVF-PQ."""
+    return make_index(embeddings, index_config)
+
+
+def save_index(index, path=INDEX_PATH):
+    # Write then rename: other advisor processes may have the old file memory-mapped
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def write_manifest(courses, index, courses_path=COURSES_PATH, model_name=MODEL_NAME, path=MANIFEST_PATH,
+                   index_config=None):
+    """Record what the index on disk was built from, so startup can skip re-reading it."""
+    texts = "\n".join(course_text(c) for c in courses)
+    manifest = {
+        "model": model_name,
+        "metric": METRIC,
+        "dimension": index.d,
+        "count": index.ntotal,
+        "index": resolve_config(index_config),
+        "corpus_hash": hashlib.sha256(texts.encode('utf-8')).hexdigest(),
+        "course_ids": [c['code'] for c in courses],
+        "source": dict(source_stamp(courses_path), sha256=file_sha256(courses_path)),
+    }
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def index_is_fresh(courses_path=COURSES_PATH, model_name=MODEL_NAME, path=MANIFEST_PATH):
+    """Check the index against courses.json without parsing either of them.
+
+    A matching size and mtime is trusted as-is; otherwise the file hash decides,
+    so edits that keep the course count the same are still caught.
+    """
+    manifest = read_manifest(path)
+    if not manifest or manifest.get("model") != model_name or manifest.get("metric") != METRIC:
+        return False
+    if not os.path.exists(INDEX_PATH):
+        return False
+
+    source = manifest["source"]
+    stamp = source_stamp(courses_path)
+    if stamp["size"] == source["size"] and stamp["mtime_ns"] == source["mtime_ns"]:
+        return True
+    if stamp["size"] != source["size"] or file_sha256(courses_path) != source["sha256"]:
+        return False
+
+    # Touched but identical: refresh the stamp so the next check is O(1) again
+    manifest["source"] = dict(stamp, sha256=source["sha256"])
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+
+def rebuild_index(courses, model, courses_path=COURSES_PATH, index_config=None):
+    """Re-embed (reusing cached vectors), write the index, metadata and manifest.
+
+    Without an explicit `index_config` the previous build's index type is kept.
+    """
+    if index_config is None:
+        index_config = (read_manifest() or {}).get("index")
+    index = build_index(embed_courses(courses, model), index_config)
+    save_index(index)
+    write_manifest(courses, index, courses_path, model_id(model), index_config=index_config)
+    return index
+
+
+def load_index(courses, model, courses_path=COURSES_PATH, on_rebuild=None):
+    """Return the FAISS index for `courses`, rebuilding it in-process with `model` if stale."""
+    if index_is_fresh(courses_path, model_id(model)):
+        # Memory-mapped, so advisor processes on one host share the vectors' pages
+        config = read_manifest().get("index")
+        index = faiss.read_index(INDEX_PATH, mmap_flag(config))
+        return apply_search_params(index, config)
+    if on_rebuild:
+        on_rebuild()
+    return rebuild_index(courses, model, courses_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Embed courses.json and build the FAISS index")
+    parser.add_argument("--backend", choices=BACKENDS, default=EMBED_BACKEND,
+                        help="embedding runtime (default from $EMBED_BACKEND); queries must use the same one")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=0,
+                        help="encode with a multi-process pool of this many CPU workers")
+    parser.add_argument("--no-sort", action="store_true",
+                        help="encode in catalog order instead of length-bucketed batches")
+    parser.add_argument("--index", choices=INDEX_TYPES, default="flat", help="FAISS index type")
+    parser.add_argument("--nlist", type=int, help="IVF clusters (default ~4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, help="IVF clusters searched per query")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW neighbours per node")
+    parser.add_argument("--ef-search", type=int, help="HNSW query-time candidate list size")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ sub-quantizers (must divide the dimension)")
+    return parser.parse_args(argv)
+
+
+def index_config_from_args(args):
+    return {"type": args.index, "nlist": args.nlist, "nprobe": args.nprobe,
+            "hnsw_m": args.hnsw_m, "ef_search": args.ef_search, "pq_m": args.pq_m}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("Running embed.py")
+    print("Loading courses...")
+    courses = load_courses()
+    print(f"Loading embedding model ({args.backend})...")
+    model = load_model(MODEL_NAME, args.backend)
+
+    print("Creating embeddings...")
+    store = EmbeddingStore(model_id(model))
+    start = time.perf_counter()
+    embeddings = embed_courses(courses, model, store, batch_size=args.batch_size,
+                               sort_by_length=not args.no_sort, processes=args.processes)
+    print(f"Encoded {store.encoded} new/changed courses, reused {store.reused} cached vectors "
+          f"({time.perf_counter() - start:.2f}s)")
+
+    print("Building FAISS index...")
+    start = time.perf_counter()
+    index_config = index_config_from_args(args)
+    index = build_index(embeddings, index_config)
+    print(f"Built {index_config['type']} index over {index.ntotal} vectors ({(time.perf_counter() - start) * 1000:.1f}ms)")
+    save_index(index)
+    print("Saving manifest...")
+    write_manifest(courses, index, model_name=model_id(model), index_config=index_config)
+    print("All files saved.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import platform
+from importlib.util import find_spec
+
+import numpy as np
+
+# "torch" runs the model in fp32; "onnx-int8" runs a dynamically int8-quantized ONNX export on ONNX Runtime
+BACKENDS = ("torch", "onnx-int8")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+ONNX_DIR = "data/onnx"
+# optimum's dynamic quantization presets: avx2 runs on any recent x86-64 CPU
+QUANTIZATION = "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "avx2"
+ONNX_SUFFIX = f"int8_{QUANTIZATION}"
+ONNX_FILE = f"model_{ONNX_SUFFIX}.onnx"
+
+
+def export_int8(model_name, directory):
+    """Export the model to ONNX and write a dynamically int8-quantized copy next to it (done once)."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save_pretrained(directory)
+    export_dynamic_quantized_onnx_model(model, QUANTIZATION, directory, file_suffix=ONNX_SUFFIX)
+
+
+def load_model(model_name, backend=EMBED_BACKEND):
+    """A SentenceTransformer for `backend`, exporting and quantizing the ONNX model on first use.
+
+    The returned model carries an `embedding_id` naming both model and backend;
+    vectors from different backends are not interchangeable, so stores and
+    index manifests are keyed by it.
+    """
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        model = SentenceTransformer(model_name)
+    elif backend == "onnx-int8":
+        if find_spec("onnxruntime") is None or find_spec("optimum") is None:
+            raise ImportError('the onnx-int8 backend needs ONNX Runtime: pip install "sentence-transformers[onnx]"')
+        directory = os.path.join(ONNX_DIR, model_name)
+        if not os.path.exists(os.path.join(directory, "onnx", ONNX_FILE)):
+            print(f"📦 Exporting {model_name} to int8 ONNX (first run only)...")
+            export_int8(model_name, directory)
+        model = SentenceTransformer(directory, backend="onnx", model_kwargs={"file_name": f"onnx/{ONNX_FILE}"})
+    else:
+        raise ValueError(f"unknown embedding backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    model.embedding_id = model_name if backend == "torch" else f"{model_name}@{backend}"
+    return model
+
+
+def agreement(reference, candidate, reference_queries, candidate_queries, k=5):
+    """How closely `candidate` vectors track `reference` ones (all rows normalized).
+
+    Returns the mean and minimum per-row cosine over the corpus and queries, and
+    the mean overlap between each query's top-k corpus hits under both.
+    """
+    cosines = np.concatenate([np.sum(reference * candidate, axis=1),
+                              np.sum(reference_queries * candidate_queries, axis=1)])
+    reference_top = np.argsort(-(reference_queries @ reference.T), axis=1)[:, :k]
+    candidate_top = np.argsort(-(candidate_queries @ candidate.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(reference_top, candidate_top)])
+    return {"mean_cosine": float(cosines.mean()), "min_cosine": float(cosines.min()),
+            "topk_overlap": float(overlap)}
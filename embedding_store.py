@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+STORE_DIR = "data/embeddings"
+
+
+class EmbeddingStore:
+    """Persistent, content-addressed cache of text embeddings.
+
+    Vectors live in a memory-mapped `vectors.npy`; `keys.json` lists the
+    sha256(model name + text) key of each row. Texts whose key is already
+    stored reuse their vector, only new or edited texts go through the model.
+    """
+
+    def __init__(self, model_name, directory=STORE_DIR):
+        self.model_name = model_name
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.keys_path = os.path.join(directory, "keys.json")
+        self.rows = {}
+        self.vectors = None
+        self.reused = 0
+        self.encoded = 0
+
+        if os.path.exists(self.vectors_path) and os.path.exists(self.keys_path):
+            with open(self.keys_path, "r") as f:
+                keys = json.load(f)
+            self.vectors = np.load(self.vectors_path, mmap_mode="r")
+            if len(keys) == len(self.vectors):
+                self.rows = {key: row for row, key in enumerate(keys)}
+            else:
+                self.vectors = None
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def encode(self, texts, encode_fn):
+        """Return a float32 matrix of embeddings for `texts`, in order.
+
+        `encode_fn(list_of_texts)` is only called for texts not in the store.
+        """
+        keys = [self.key(text) for text in texts]
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+
+        fresh = {}
+        if missing:
+            new_vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing, new_vectors))
+
+        dimension = new_vectors.shape[1] if missing else self.vectors.shape[1]
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        for i, key in enumerate(keys):
+            embeddings[i] = fresh[key] if key in fresh else self.vectors[self.rows[key]]
+
+        self.encoded = len(fresh)
+        self.reused = len(texts) - sum(1 for key in keys if key in fresh)
+        if fresh or set(keys) != set(self.rows):
+            self.save(keys, embeddings)
+        return embeddings
+
+    def save(self, keys, embeddings):
+        """Persist exactly the given rows, dropping vectors no longer in the catalog."""
+        unique = {}
+        for row, key in enumerate(keys):
+            unique.setdefault(key, row)
+        os.makedirs(self.directory, exist_ok=True)
+
+        vectors = embeddings[list(unique.values())]
+        tmp_path = self.vectors_path + ".tmp.npy"
+        np.save(tmp_path, vectors)
+        self.vectors = None  # drop the old memory map before replacing the file
+        os.replace(tmp_path, self.vectors_path)
+        with open(self.keys_path, "w") as f:
+            json.dump(list(unique), f)
+
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        self.rows = {key: row for row, key in enumerate(unique)}
@@ -0,0 +1,97 @@
+import re
+import threading
+
+# Factual intents answerable straight from a course record, checked in order
+INTENT_KEYWORDS = {
+    "prerequisites": ("prerequisite", "prereq", "requirement", "required before", "need to take before"),
+    "meets": ("when does", "when is", "what time", "meet", "schedule", "what days", "where is", "where does"),
+    "instructor": ("who teaches", "who is teaching", "instructor", "professor", "taught by", "teacher"),
+    "description": ("what is", "what's", "about", "describe", "cover", "overview", "summary"),
+}
+# Anything asking for judgement or planning goes to the LLM
+ADVICE_PATTERN = re.compile(
+    r"\b(should|recommend\w*|suggest\w*|better|best|compare|vs|versus|instead|plan\w*|similar"
+    r"|like|worth|easier|harder|after|next|help me)\b"
+)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def clean(value):
+    """Collapse the multi-line cells the scraper leaves in instructor/meets."""
+    parts = [part.strip() for part in re.split(r"\s*\n\s*", value or "") if part.strip()]
+    return " and ".join(parts)
+
+
+def prerequisite_sentences(description):
+    sentences = [s.strip() for s in SENTENCE_SPLIT.split(description or "") if s.strip()]
+    return [s for s in sentences if "prerequisite" in s.lower()]
+
+
+class FastPathRouter:
+    """Answers factual questions about a named course directly from its record.
+
+    A question goes down the fast path only if it names a course code and asks
+    for its instructor, meeting time, description or prerequisites without
+    asking for advice; everything else falls through to retrieval + LLM.
+    Counts how many questions each path handled; `route` may be called from
+    several threads at once.
+    """
+
+    def __init__(self, courses, lexical_index):
+        self.courses = courses
+        self.lexical_index = lexical_index
+        self.counts = {"fast": 0, "llm": 0}
+        self.lock = threading.Lock()
+
+    def detect_intent(self, question):
+        text = question.lower()
+        if ADVICE_PATTERN.search(text):
+            return None
+        for intent, keywords in INTENT_KEYWORDS.items():
+            if any(keyword in text for keyword in keywords):
+                return intent
+        return None
+
+    def route(self, question):
+        """Return (answer, courses) for a fast-path question, or None to fall through."""
+        ids = self.lexical_index.exact_matches(question)
+        intent = self.detect_intent(question) if ids else None
+        if intent is None:
+            with self.lock:
+                self.counts["llm"] += 1
+            return None
+
+        courses = [self.courses[i] for i in ids]
+        answer = "\n".join(self.answer(course, intent) for course in courses)
+        with self.lock:
+            self.counts["fast"] += 1
+        return answer, courses
+
+    def answer(self, course, intent):
+        name = f"{course['code']} ({course['title']})"
+        if intent == "instructor":
+            instructor = clean(course.get("instructor"))
+            if instructor and instructor != "N/A":
+                return f"{name} is taught by {instructor}."
+            return f"No instructor is listed for {name} yet."
+        if intent == "meets":
+            meets = clean(course.get("meets"))
+            if meets and meets != "N/A":
+                return f"{name} meets {meets}."
+            return f"No meeting time is listed for {name} yet."
+        if intent == "prerequisites":
+            sentences = prerequisite_sentences(course.get("description"))
+            if sentences:
+                return f"{name}: " + " ".join(sentences)
+            return f"No prerequisites are listed in the course description for {name}."
+        description = course.get("description")
+        if description and description != "N/A":
+            return f"{name}: {description}"
+        return f"No description is listed for {name}."
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return {path: {"count": count, "fraction": count / total if total else 0.0}
+                for path, count in counts.items()}
@@ -1,21 +1,19 @@
+# First, so startup timings count from (nearly) process start
+from startup_timer import StartupTimer
+
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, font
 import threading
-import json
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
-import subprocess
-import openai
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import time
 
+from tracing import Tracer, format_breakdown
 # Configure OpenAI
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
-if not openai.api_key:
+if not os.getenv("OPENAI_API_KEY"):
     # Show a friendly message box if running GUI without key
     try:
         tk.Tk().withdraw()
@@ -25,13 +23,25 @@ if not openai.api_key:
         pass
     raise SystemExit("OPENAI_API_KEY environment variable is required.")
 
+# How often the Tk thread applies what the workers posted, and the most it applies per pass
+POLL_MS = 30
+MAX_RESULTS_PER_POLL = 200
+
+
+class QuestionCancelled(Exception):
+    """Raised in a worker when its question was stopped or superseded."""
+
+
 class BrownCourseAdvisorGUI:
     def __init__(self):
+        self.startup = StartupTimer()
+        self.startup.mark("imports")
         self.root = tk.Tk()
         self.setup_window()
         self.setup_styles()
         self.setup_variables()
         self.setup_ui()
+        self.poll_results()
         self.setup_advisor()
         
     def setup_window(self):
@@ -96,12 +106,21 @@ class BrownCourseAdvisorGUI:
     
     def setup_variables(self):
         """Initialize application variables"""
-        self.conversation_history = []
+        self.pending_questions = []
         self.is_loading = False
+        # Warm-up and questions run here; a stopped question may still be finishing while the next starts
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="advisor")
+        # Workers never touch Tk: they post (ticket, callback, args) and poll_results runs them
+        self.results = queue.SimpleQueue()
+        self.ticket = 0
+        self.active_ticket = None
+        self.cancel_event = threading.Event()
+        self.streaming = False
+        # The BrownCourseAdvisor answering questions, and whether its warm-up finished
         self.advisor = None
-        self.courses = None
-        self.index = None
-        self.model = None
+        self.advisor_ready = False
+        # Always on: the status bar shows each answer's stage breakdown
+        self.tracer = Tracer(enabled=True)
     
     def setup_ui(self):
         """Create the main user interface"""
@@ -260,8 +279,17 @@ class BrownCourseAdvisorGUI:
                                      style='Primary.TButton')
         self.send_button.pack(side='right', padx=(0, 15), pady=10)
         
-        # Bind Enter key to send
+        # Stop button, enabled while a question is being answered
+        self.stop_button = ttk.Button(input_container,
+                                     text="Stop\n⏹",
+                                     command=self.cancel_question,
+                                     style='Danger.TButton',
+                                     state='disabled')
+        self.stop_button.pack(side='right', padx=(0, 5), pady=10)
+        
+        # Bind Enter key to send, Escape to stop
         self.question_entry.bind('<Control-Return>', lambda e: self.send_question())
+        self.root.bind('<Escape>', lambda e: self.cancel_question())
         
         # Placeholder text
         self.question_entry.insert('1.0', "Ask me anything about courses, prerequisites, schedules, or academic planning...")
@@ -299,39 +327,66 @@ class BrownCourseAdvisorGUI:
             self.question_entry.insert('1.0', "Ask me anything about courses, prerequisites, schedules, or academic planning...")
             self.question_entry.configure(fg=self.colors['text_secondary'])
     
+    def post(self, ticket, callback, *args):
+        """From a worker: have the Tk thread run callback(*args), unless `ticket` is no longer current."""
+        self.results.put((ticket, callback, args))
+    
+    def poll_results(self):
+        """On the Tk thread: apply what the workers posted, dropping results of stopped questions"""
+        try:
+            for _ in range(MAX_RESULTS_PER_POLL):
+                try:
+                    ticket, callback, args = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                if ticket is not None and ticket != self.active_ticket:
+                    continue
+                try:
+                    callback(*args)
+                except Exception as e:
+                    # One bad update must not stop every later result from showing
+                    print(f"⚠️  GUI update failed: {e}")
+        finally:
+            self.root.after(POLL_MS, self.poll_results)
+    
     def setup_advisor(self):
-        """Initialize the course advisor in a separate thread"""
+        """Warm up the course advisor in the background while the window is already usable.
+
+        query (and through it sentence_transformers, faiss, openai) is imported
+        on the executor rather than at module top, so the window appears immediately.
+        """
+        def status(message):
+            self.post(None, self.update_status, message, self.colors['warning'])
+        
         def init_advisor():
             try:
-                self.update_status("Loading course data...", self.colors['warning'])
-                
-                # Load courses data
-                with open('data/courses.json', 'r') as f:
-                    self.courses = json.load(f)
-                
-                # Check if embeddings need to be regenerated
-                with open('data/course_index.json', 'r') as f:
-                    course_embeddings = json.load(f)
-                
-                if len(course_embeddings) != len(self.courses):
-                    self.update_status("Regenerating embeddings...", self.colors['warning'])
-                    subprocess.run(["python3", "embed.py"])
-                
-                self.update_status("Loading AI model...", self.colors['warning'])
-                
-                # Load FAISS index and model
-                self.index = faiss.read_index('data/course_index.faiss')
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
-                
-                self.update_status("Ready to help! 🎓", self.colors['success'])
-                self.add_welcome_message()
+                from query import BrownCourseAdvisor
+                from query_cache import QUERY_CACHE_PATH
+                from response_cache import RESPONSE_CACHE_PATH
+                self.advisor = BrownCourseAdvisor(query_cache_path=QUERY_CACHE_PATH,
+                                                  response_cache_path=RESPONSE_CACHE_PATH, background=True,
+                                                  on_status=status, tracer=self.tracer, startup=self.startup)
+                self.advisor.wait_until_ready()
+                self.post(None, self.on_advisor_ready)
                 
             except Exception as e:
-                self.update_status(f"Error: {str(e)}", self.colors['accent'])
-                messagebox.showerror("Initialization Error", f"Failed to initialize the advisor:\n{str(e)}")
+                error = str(e)
+                self.post(None, self.update_status, f"Error: {error}", self.colors['accent'])
+                self.post(None, messagebox.showerror, "Initialization Error",
+                          f"Failed to initialize the advisor:\n{error}")
         
-        # Run initialization in background thread
-        threading.Thread(target=init_advisor, daemon=True).start()
+        self.executor.submit(init_advisor)
+    
+    def on_advisor_ready(self):
+        """Report the startup breakdown and answer anything asked during warm-up"""
+        self.advisor_ready = True
+        print(f"⏱️  Startup: {self.startup.summary()}")
+        self.update_status(f"Ready to help! 🎓 (started in {self.startup.milestones['ready']:.1f}s)",
+                           self.colors['success'])
+        if self.pending_questions:
+            self.ask_next_queued()
+        else:
+            self.add_welcome_message()
     
     def update_status(self, message, color=None):
         """Update the status indicator"""
@@ -339,7 +394,6 @@ class BrownCourseAdvisorGUI:
             self.status_indicator.configure(fg=color)
         self.status_indicator.configure(text=f"● {message}")
         self.status_label.configure(text=message)
-        self.root.update_idletasks()
     
     def add_welcome_message(self):
         """Add welcome message to chat"""
@@ -419,108 +473,186 @@ Ask me anything about courses, and I'll provide personalized advice based on you
         if not question or question == "Ask me anything about courses, prerequisites, schedules, or academic planning...":
             return
         
-        if self.is_loading or not self.model:
-            return
-        
         # Clear input
         self.question_entry.delete('1.0', 'end')
         self.add_placeholder(None)
         
-        # Add user message
+        # Add user message; it waits its turn while the advisor is warming up
         self.add_message('user', question)
+        self.pending_questions.append(question)
+        if not self.advisor_ready:
+            self.update_status(f"Warming up... {len(self.pending_questions)} question(s) queued",
+                               self.colors['warning'])
+            return
+        # A new question supersedes the one still being answered
+        self.cancel_question(status="Previous question dropped")
+        self.ask_next_queued()
+    
+    def ask_next_queued(self):
+        """Start answering the oldest queued question unless one is in progress"""
+        if self.is_loading or not self.pending_questions:
+            return
+        question = self.pending_questions.pop(0)
         
         # Show loading state
         self.set_loading_state(True)
         
-        # Process question in background thread
-        threading.Thread(target=self.process_question, args=(question,), daemon=True).start()
+        # Each question gets a ticket; results posted under an older one are dropped
+        self.ticket += 1
+        self.active_ticket = self.ticket
+        self.cancel_event = threading.Event()
+        self.executor.submit(self.process_question, self.ticket, question, self.cancel_event)
+    
+    def cancel_question(self, status="Stopped ⏹"):
+        """Stop the question being answered: its worker quits at the next step, and its results are dropped"""
+        if not self.is_loading:
+            return
+        self.cancel_event.set()
+        self.active_ticket = None
+        if self.streaming:
+            self.finish_streamed_message([], " … (stopped)")
+        self.set_loading_state(False, status)
+        self.ask_next_queued()
     
-    def process_question(self, question):
-        """Process the user's question"""
+    def finish_question(self, status):
+        self.set_loading_state(False, status)
+        self.ask_next_queued()
+    
+    def process_question(self, ticket, question, cancel):
+        """Worker: answer the question, posting streamed text and the result to the Tk thread"""
+        status = None
+        streamed = []
+        
+        def check():
+            if cancel.is_set():
+                raise QuestionCancelled()
+        
+        def on_token(token):
+            check()
+            if not streamed:
+                self.post(ticket, self.begin_streamed_message)
+            streamed.append(token)
+            self.post(ticket, self.append_streamed_text, token)
+        
+        advisor = self.advisor
+        first_token = prompt_tokens = None
         try:
-            # Encode question
-            vector = self.model.encode(question)
-            _, indices = self.index.search(np.array([vector]), 3)
-            
-            # Get relevant courses
-            course_list = [self.courses[i] for i in indices[0]]
-            
-            # Generate advice
-            conversation_context = "Previous conversation context: " + " ".join([f"Q: {entry['question']} A: {entry['response'][:100]}..." for entry in self.conversation_history[-2:]])
-            advice = self.ask_chat(question, course_list, conversation_context)
+            with self.tracer.question() as trace:
+                # Factual questions about a named course are answered from its record
+                with self.tracer.span("fast_path"):
+                    fast = advisor.router.route(question)
+                if fast:
+                    advice, course_list = fast
+                    share = advisor.router.stats()['fast']['fraction']
+                    status = f"Answered from course data ⚡ ({share:.0%} of questions so far)"
+                else:
+                    course_list = advisor.retrieve(question)
+                    check()
+                    advice, first_token, prompt_tokens = self.ask_chat(question, course_list, on_token, cancel)
+                
+                # A stopped question is not part of the conversation
+                check()
+                with self.tracer.span("memory"):
+                    advisor.conversation_history.add(question, advice, [course['code'] for course in course_list])
             
-            # Store in conversation history
-            self.conversation_history.append({
-                "question": question,
-                "response": advice,
-                "courses": course_list
-            })
+            # Update UI in main thread; cached answers and errors arrive in one piece
+            if streamed:
+                remainder = "" if advice == "".join(streamed) else "\n" + advice
+                self.post(ticket, self.finish_streamed_message, course_list, remainder)
+            else:
+                self.post(ticket, self.display_response, advice, course_list)
             
-            # Update UI in main thread
-            self.root.after(0, lambda: self.display_response(advice, course_list))
+            # Where the time went, e.g. "Ready · llm 0.84s · encode 12ms · ... (total 0.87s)"
+            if not fast:
+                first_token = f"first token {first_token:.2f}s, " if first_token is not None else ""
+                prompt_tokens = f"prompt {prompt_tokens} tokens, " if prompt_tokens is not None else ""
+                status = f"Ready · {format_breakdown(trace)} ({first_token}{prompt_tokens}total {trace['total']:.2f}s)"
             
+        except QuestionCancelled:
+            pass  # cancel_question() already updated the UI
         except Exception as e:
             error_msg = f"Sorry, I encountered an error: {str(e)}"
-            self.root.after(0, lambda: self.display_response(error_msg, []))
+            self.post(ticket, self.display_response, error_msg, [])
         finally:
-            self.root.after(0, lambda: self.set_loading_state(False))
+            self.post(ticket, self.finish_question, status)
     
-    def ask_chat(self, question, course_list, conversation_context=""):
-        """Generate AI response"""
-        prompt = f"""You're an academic advisor at Brown University. Use the course data below to recommend helpful courses. Be smart, kind, and specific.
-        
-        {conversation_context}
-        
-        COURSES:
-        {json.dumps(course_list, indent=2)}
-
-        QUESTION:
-        {question} 
-        """
-        
-        messages = [
-            {"role": "system", "content": "You are a helpful Brown University academic advisor. Provide specific, actionable course recommendations based on the student's questions."}
-        ]
-        
-        # Add conversation history for context
-        for entry in self.conversation_history[-4:]:
-            messages.append({"role": "user", "content": entry["question"]})
-            messages.append({"role": "assistant", "content": entry["response"]})
-        
-        messages.append({"role": "user", "content": prompt})
-        
+    def ask_chat(self, question, course_list, on_token, cancel):
+        """Generate AI response: (answer, seconds to the first streamed token, prompt tokens), None for unknowns"""
+        history, summary = self.advisor.conversation_history.snapshot()
+        cached, request = self.advisor.prepare_chat(question, course_list, history, summary)
+        if cached is not None:
+            return cached, None, None
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
-            return response['choices'][0]['message']['content']
+            # Stopping the question also stops the client's retries
+            answer, first_token = self.advisor.complete_chat(request, on_token, cancel)
+            return answer, first_token, request[3]
+        except QuestionCancelled:
+            raise
         except Exception as e:
-            return f"Sorry, I encountered an error: {str(e)}. Please try again."
+            if cancel.is_set():
+                raise QuestionCancelled() from e
+            return f"Sorry, I encountered an error: {str(e)}. Please try again.", None, request[3]
     
     def display_response(self, response, courses):
         """Display the AI response"""
         self.add_message('assistant', response, courses)
     
-    def set_loading_state(self, loading):
+    def begin_streamed_message(self):
+        """Start an advisor message that streamed text is appended to"""
+        self.chat_display.configure(state='normal')
+        timestamp = datetime.now().strftime("%H:%M")
+        self.chat_display.insert('end', f"[{timestamp}] ", 'timestamp')
+        self.chat_display.insert('end', "Advisor: ", 'assistant')
+        self.chat_display.configure(state='disabled')
+        self.chat_display.see('end')
+        self.streaming = True
+    
+    def append_streamed_text(self, text):
+        """Append a streamed piece of the advisor's answer"""
+        self.chat_display.configure(state='normal')
+        self.chat_display.insert('end', text, 'assistant')
+        self.chat_display.configure(state='disabled')
+        self.chat_display.see('end')
+    
+    def finish_streamed_message(self, courses, remainder=""):
+        """Close the streamed message and show its courses"""
+        self.streaming = False
+        self.chat_display.configure(state='normal')
+        self.chat_display.insert('end', f"{remainder}\n\n", 'assistant')
+        self.chat_display.configure(state='disabled')
+        self.chat_display.see('end')
+        if courses:
+            self.display_courses(courses)
+    
+    def set_loading_state(self, loading, status=None):
         """Set loading state for UI elements"""
         self.is_loading = loading
         
         if loading:
-            self.send_button.configure(state='disabled')
+            self.stop_button.configure(state='normal')
             self.progress.pack(side='right', padx=20, pady=5)
             self.progress.start()
             self.update_status("Thinking... 🤔", self.colors['warning'])
         else:
-            self.send_button.configure(state='normal')
+            self.stop_button.configure(state='disabled')
             self.progress.pack_forget()
             self.progress.stop()
-            self.update_status("Ready to help! 🎓", self.colors['success'])
+            self.update_status(status or "Ready to help! 🎓", self.colors['success'])
+    
+    def on_close(self):
+        """Stop any question, persist the question cache and close the window"""
+        self.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.advisor_ready:
+            self.advisor.query_cache.save()
+            self.advisor.response_cache.close()
+        self.tracer.close()
+        self.root.destroy()
     
     def run(self):
         """Start the GUI application"""
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(0, lambda: self.startup.mark("window"))
         self.root.mainloop()
 
 if __name__ == "__main__":
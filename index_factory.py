@@ -0,0 +1,86 @@
+import math
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+
+# Settings understood by make_index(); anything left out is derived from the data size
+DEFAULT_CONFIG = {
+    "type": "flat",
+    "nlist": None,           # IVF / IVF-PQ: number of coarse clusters
+    "nprobe": 8,             # IVF / IVF-PQ: clusters visited per query
+    "hnsw_m": 32,            # HNSW: neighbours per node
+    "ef_construction": 80,   # HNSW: build-time candidate list
+    "ef_search": 64,         # HNSW: query-time candidate list
+    "pq_m": 48,              # IVF-PQ: sub-quantizers, must divide the dimension
+    "pq_bits": None,         # IVF-PQ: bits per code (8, fewer on small catalogs)
+}
+
+
+def resolve_config(config=None):
+    resolved = dict(DEFAULT_CONFIG)
+    resolved.update({key: value for key, value in (config or {}).items() if value is not None})
+    if resolved["type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {resolved['type']!r}, expected one of {', '.join(INDEX_TYPES)}")
+    return resolved
+
+
+def default_nlist(count):
+    # ~4 * sqrt(n) clusters, while keeping enough points per cluster to train
+    return max(1, min(int(4 * math.sqrt(count)), count // 39 or 1))
+
+
+def default_pq_bits(count):
+    # 2**bits centroids per sub-quantizer, each wanting ~39 training points
+    return max(1, min(8, int(math.log2(max(count // 39, 2)))))
+
+
+def factory_string(config, count):
+    kind = config["type"]
+    if kind == "flat":
+        return "Flat"
+    if kind == "hnsw":
+        return f"HNSW{config['hnsw_m']},Flat"
+    nlist = config["nlist"] or default_nlist(count)
+    if kind == "ivf":
+        return f"IVF{nlist},Flat"
+    return f"IVF{nlist},PQ{config['pq_m']}x{config['pq_bits'] or default_pq_bits(count)}"
+
+
+def make_index(embeddings, config=None, metric=faiss.METRIC_INNER_PRODUCT):
+    """Build, train (if the type needs it) and fill an index over `embeddings`."""
+    config = resolve_config(config)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    index = faiss.index_factory(embeddings.shape[1], factory_string(config, len(embeddings)), metric)
+    if config["type"] == "hnsw":
+        index.hnsw.efConstruction = config["ef_construction"]
+    if config["type"] == "ivfpq":
+        # Polysemous codes only help Hamming-filtered search, and dominate training time
+        faiss.downcast_index(faiss.extract_index_ivf(index)).do_polysemous_training = False
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    apply_search_params(index, config)
+    return index
+
+
+def mmap_flag(config=None):
+    """faiss.read_index flag that maps this index type's vectors from disk instead of copying them to RAM.
+
+    IVF types map their inverted lists; Flat and HNSW map their flat codes
+    (needs faiss >= 1.11, otherwise the index is read normally).
+    """
+    if resolve_config(config)["type"] in ("ivf", "ivfpq"):
+        return faiss.IO_FLAG_MMAP
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def apply_search_params(index, config=None):
+    """Set query-time knobs (nprobe / efSearch); they are not all kept by write_index."""
+    config = resolve_config(config)
+    if config["type"] in ("ivf", "ivfpq"):
+        faiss.downcast_index(faiss.extract_index_ivf(index)).nprobe = config["nprobe"]
+    elif config["type"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = config["ef_search"]
+    return index
@@ -7,9 +7,10 @@ A beautiful, user-friendly interface for the Brown Course Advisor
 import sys
 import os
 import subprocess
+from importlib.util import find_spec
 
 def check_dependencies():
-    """Check if all required dependencies are installed"""
+    """Check if all required dependencies are installed (without importing them)"""
     required_packages = [
         'sentence_transformers',
         'faiss',
@@ -18,18 +19,8 @@ def check_dependencies():
         'tkinter'
     ]
     
-    missing_packages = []
-    
-    for package in required_packages:
-        try:
-            if package == 'faiss':
-                import faiss
-            elif package == 'tkinter':
-                import tkinter
-            else:
-                __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec only locates the package; importing torch & co. here would cost seconds
+    missing_packages = [package for package in required_packages if find_spec(package) is None]
     
     if missing_packages:
         print("❌ Missing required packages:")
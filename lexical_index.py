@@ -0,0 +1,114 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+# Field weights: a term in the code or title says more than one in the description
+FIELD_WEIGHTS = {"code": 3, "title": 2, "instructor": 2, "description": 1}
+STOPWORDS = {
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "by", "can", "course", "courses",
+    "do", "does", "for", "from", "how", "i", "in", "is", "it", "me", "of", "on", "or", "should",
+    "take", "that", "the", "there", "this", "to", "what", "which", "who", "with", "you",
+}
+# Course codes as students type them: CSCI1470, csci 1470, CS1470, CSCI1951-C, csci1951c
+CODE_PATTERN = re.compile(r"\b([a-z]{2,4})\s?(\d{4}[a-z]?(?:-?[a-z])?)\b", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+RRF_K = 60
+# How many dense and BM25 results go into the fusion
+CANDIDATES = 20
+# Postings read per query term; they are impact-ordered, so this only cuts low scorers
+MAX_POSTINGS = 200
+
+
+def normalize_number(number):
+    """"1951-C" and "1951c" are the same course number."""
+    return number.lower().replace("-", "")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over course code, title, instructor and description.
+
+    Each posting stores its precomputed BM25 contribution, and postings are
+    sorted by it. A query reads at most `max_postings` per term, so its cost is
+    bounded by the number of query terms, not by the catalog size.
+    """
+
+    def __init__(self, courses, k1=1.2, b=0.75, max_postings=MAX_POSTINGS):
+        self.max_postings = max_postings
+        postings = defaultdict(list)
+        self.codes = {}
+        self.numbers = defaultdict(list)
+        self.departments = set()
+        lengths = []
+
+        for doc_id, course in enumerate(courses):
+            code = course.get("code", "").lower()
+            self.codes[code] = doc_id
+            match = CODE_PATTERN.fullmatch(code)
+            if match:
+                dept, number = match.group(1), normalize_number(match.group(2))
+                self.codes[dept + number] = doc_id
+                self.departments.add(dept)
+                self.numbers[number].append(doc_id)
+
+            counts = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(course.get(field) or ""):
+                    counts[token] += weight
+            lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                postings[token].append((doc_id, tf))
+
+        count = len(lengths)
+        avg_length = sum(lengths) / max(count, 1)
+        self.postings = {}
+        for token, docs in postings.items():
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            impacts = []
+            for doc_id, tf in docs:
+                norm = k1 * (1 - b + b * lengths[doc_id] / avg_length)
+                impacts.append((doc_id, idf * tf * (k1 + 1) / (tf + norm)))
+            impacts.sort(key=lambda posting: posting[1], reverse=True)
+            self.postings[token] = impacts
+
+    def exact_matches(self, query):
+        """Courses whose code appears in the query, e.g. "CSCI1470", "cs 1470" or "CSCI1951-C"."""
+        matches = []
+        for dept, number in CODE_PATTERN.findall(query):
+            dept, number = dept.lower(), normalize_number(number)
+            if dept + number in self.codes:
+                matches.append(self.codes[dept + number])
+            elif any(known.startswith(dept) for known in self.departments):
+                # An abbreviated department ("cs 1470") still names the course
+                matches.extend(self.numbers.get(number, []))
+        return list(dict.fromkeys(matches))
+
+    def search(self, query, k=10, allowed=None):
+        """Top-k course ids by BM25 score, only among `allowed` ids if given."""
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token, ())
+            if allowed is None:
+                postings = postings[:self.max_postings]
+            for doc_id, impact in postings:
+                if allowed is None or doc_id in allowed:
+                    scores[doc_id] += impact
+        return heapq.nlargest(k, scores, key=scores.get)
+
+    def hybrid(self, query, dense_ids, k=3, candidates=CANDIDATES, allowed=None):
+        """Fuse dense (FAISS) ids with BM25 by reciprocal rank fusion.
+
+        Courses named by code in the query always come first, even outside `allowed`.
+        """
+        fused = defaultdict(float)
+        for ranking in (dense_ids, self.search(query, candidates, allowed)):
+            for rank, doc_id in enumerate(ranking):
+                if doc_id >= 0:
+                    fused[doc_id] += 1.0 / (RRF_K + rank + 1)
+        exact = self.exact_matches(query)
+        ranked = exact + [doc_id for doc_id in sorted(fused, key=fused.get, reverse=True) if doc_id not in exact]
+        return ranked[:k]
@@ -0,0 +1,331 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+# openai (and the aiohttp/requests stack behind it) is imported on first use, not at startup
+CHAT_MODEL = "gpt-3.5-turbo"
+# Seconds to connect, and to wait for the reply (for a stream: for each chunk)
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+# Retries after a 429, 5xx, timeout or connection error, with jittered exponential backoff
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+# Requests in flight at once per client: across threads, and per event loop for acomplete()
+# (the HTTP service gives its client --llm-concurrency instead)
+MAX_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+# After this many requests in a row fail (retries included), fail fast for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+
+class LLMUnavailable(Exception):
+    """The LLM is not being called: the circuit breaker is open or every request slot stayed busy."""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and rejects calls for `cooldown` seconds.
+
+    Then one trial call is let through (half-open): success closes the
+    breaker, failure opens it for another cooldown.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.trial or self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def before(self):
+        """Raise LLMUnavailable unless a call may go ahead now; True if that call is the half-open trial.
+
+        The trial call must end in success(), failure() or release().
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            wait = self.cooldown - (self.clock() - self.opened_at)
+            if wait > 0 or self.trial:
+                raise LLMUnavailable(f"the AI service is failing; not retrying for {max(wait, 1):.0f}s")
+            self.trial = True
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self.trial = False
+
+    def release(self):
+        """Give up a trial that ended without a result (no request slot, cancelled), so another call may try."""
+        with self.lock:
+            self.trial = False
+
+
+def retryable(error):
+    """429s, 5xx responses, timeouts and connection errors are worth another try; bad requests are not.
+
+    Transport errors raised while a stream is being read (a stall after the
+    headers arrived) come straight from requests or aiohttp, not as openai errors.
+    """
+    import aiohttp
+    import requests
+    from openai import error as errors
+    if isinstance(error, (errors.Timeout, errors.APIConnectionError, errors.TryAgain,
+                          errors.RateLimitError, errors.ServiceUnavailableError,
+                          requests.RequestException, aiohttp.ClientError)):
+        return True
+    status = getattr(error, "http_status", None)
+    return isinstance(error, errors.APIError) and (status is None or status >= 500)
+
+
+class LLMClient:
+    """Chat completions over one pooled HTTP session, with timeouts, retries, a concurrency limit and a circuit breaker.
+
+    Every request gets (connect, read) timeouts; 429/5xx/timeout failures are
+    retried up to `max_retries` times after a full-jitter exponential backoff
+    (or the server's Retry-After); at most `max_concurrency` requests are in
+    flight; and the breaker fails fast while the service keeps failing.
+    """
+
+    def __init__(self, model=CHAT_MODEL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, max_concurrency=MAX_CONCURRENCY, breaker=None):
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = None
+        self.async_sessions = {}
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    def warm_up(self):
+        """Import the OpenAI client and open the session pool ahead of the first question."""
+        self.install_session()
+
+    def install_session(self):
+        """Share one keep-alive connection pool between all threads, instead of one session per thread."""
+        import openai
+        import requests
+        from requests.adapters import HTTPAdapter
+        with self.lock:
+            if self.session is None:
+                session = requests.Session()
+                # Retries happen here, with backoff, not silently inside the adapter
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.session = session
+            openai.requestssession = self.session
+
+    def backoff(self, attempt, error):
+        retry_after = (getattr(error, "headers", None) or {}).get("retry-after")
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except (TypeError, ValueError):
+            return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def admit(self):
+        """breaker.before(), counting rejections; True if this call is the half-open trial."""
+        try:
+            return self.breaker.before()
+        except LLMUnavailable:
+            self.count("rejected")
+            raise
+
+    def call(self, request, can_retry=lambda: True, wait=time.sleep):
+        """Run `request()` under the breaker and a request slot, retrying it as configured.
+
+        `can_retry()` is asked before and after each backoff `wait(seconds)`.
+        """
+        trial = self.admit()
+        try:
+            if not self.slots.acquire(timeout=self.timeout[1]):
+                self.count("rejected")
+                raise LLMUnavailable(f"all {self.max_concurrency} LLM request slots stayed busy")
+            try:
+                for attempt in range(self.max_retries + 1):
+                    self.count("requests")
+                    try:
+                        result = request()
+                    except Exception as e:
+                        if not retryable(e):
+                            # The service answered; the request itself was wrong
+                            self.breaker.success()
+                            raise
+                        if attempt < self.max_retries and can_retry():
+                            wait(self.backoff(attempt, e))
+                            # The caller may have given up during the backoff
+                            if can_retry():
+                                self.count("retries")
+                                continue
+                        self.count("failures")
+                        self.breaker.failure()
+                        raise
+                    else:
+                        self.breaker.success()
+                        return result
+            finally:
+                self.slots.release()
+        finally:
+            # Whatever ended the call without success() or failure(), the trial must not stay taken
+            if trial:
+                self.breaker.release()
+
+    def complete(self, messages, temperature=0.7, max_tokens=500):
+        """Blocking chat completion; returns the reply text."""
+        import openai
+        self.install_session()
+        response = self.call(lambda: openai.ChatCompletion.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            request_timeout=self.timeout
+        ))
+        return response['choices'][0]['message']['content']
+
+    def stream(self, messages, on_token, temperature=0.7, max_tokens=500, cancel=None):
+        """Streaming chat completion.
+
+        Calls `on_token(text)` for every content delta as it arrives and returns
+        (full reply, seconds until the first token). A failure is only retried
+        before the first token, so `on_token` never sees a reply twice. Once the
+        `cancel` event is set there are no more retries, and a backoff in
+        progress ends early.
+        """
+        import openai
+        self.install_session()
+        start = time.perf_counter()
+        first_token = None
+        parts = []
+
+        def request():
+            nonlocal first_token
+            chunks = openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                request_timeout=self.timeout
+            )
+            for chunk in chunks:
+                token = chunk['choices'][0].get('delta', {}).get('content')
+                if not token:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                parts.append(token)
+                on_token(token)
+
+        if cancel is None:
+            self.call(request, can_retry=lambda: not parts)
+        else:
+            self.call(request, can_retry=lambda: not parts and not cancel.is_set(), wait=cancel.wait)
+        return "".join(parts), first_token
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=500):
+        """Chat completion awaited on the event loop instead of blocking a thread.
+
+        Same timeouts, retries and breaker as complete(); each event loop gets
+        its own pooled aiohttp session and concurrency limit.
+        """
+        import aiohttp
+        import openai
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_sessions:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.async_sessions[loop] = (aiohttp.ClientSession(connector=connector),
+                                         asyncio.Semaphore(self.max_concurrency))
+        session, slots = self.async_sessions[loop]
+        openai.aiosession.set(session)
+
+        trial = self.admit()
+        try:
+            async with slots:
+                for attempt in range(self.max_retries + 1):
+                    self.count("requests")
+                    try:
+                        response = await openai.ChatCompletion.acreate(
+                            model=self.model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            request_timeout=self.timeout
+                        )
+                    except Exception as e:
+                        if not retryable(e):
+                            self.breaker.success()
+                            raise
+                        if attempt == self.max_retries:
+                            self.count("failures")
+                            self.breaker.failure()
+                            raise
+                        self.count("retries")
+                        await asyncio.sleep(self.backoff(attempt, e))
+                    else:
+                        self.breaker.success()
+                        return response['choices'][0]['message']['content']
+        finally:
+            # Also when cancelled (e.g. by asyncio.wait_for), which is not an Exception
+            if trial:
+                self.breaker.release()
+
+    async def aclose(self):
+        """Close the aiohttp session of the running event loop."""
+        entry = self.async_sessions.pop(asyncio.get_running_loop(), None)
+        if entry:
+            await entry[0].close()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, breaker=self.breaker.state)
+
+
+default_client = LLMClient()
+
+
+def warm_up():
+    """Import the OpenAI client and open its connection pool ahead of the first question."""
+    default_client.warm_up()
+
+
+def complete(messages, temperature=0.7, max_tokens=500):
+    return default_client.complete(messages, temperature, max_tokens)
+
+
+async def acomplete(messages, temperature=0.7, max_tokens=500):
+    return await default_client.acomplete(messages, temperature, max_tokens)
+
+
+def stream(messages, on_token, temperature=0.7, max_tokens=500, cancel=None):
+    return default_client.stream(messages, on_token, temperature, max_tokens, cancel)
+
+
+def stats():
+    return default_client.stats()
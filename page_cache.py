@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import threading
+
+CACHE_PATH = "data/page_cache.json"
+
+
+class PageCache:
+    """On-disk cache of course pages keyed by URL.
+
+    Each entry keeps the validators the server sent (ETag / Last-Modified),
+    a sha256 of the page body and the fields parsed out of it, so later runs
+    can send conditional requests and skip parsing pages that did not change.
+    Entries parsed for a different set of `fields` count as missing, and
+    `prune()` drops the pages a run did not visit.
+    """
+
+    def __init__(self, path=CACHE_PATH, fields=()):
+        self.path = path
+        self.fields = list(fields)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.visited = set()
+        self.stats = {"not_modified": 0, "unchanged": 0, "parsed": 0, "pruned": 0}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def entry(self, url):
+        """The usable entry for `url`: None if there is none or it holds other fields."""
+        entry = self.entries.get(url)
+        if not entry or entry.get("field_names") != self.fields:
+            return None
+        return entry
+
+    def conditional_headers(self, url):
+        with self.lock:
+            self.visited.add(url)
+        entry = self.entry(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def lookup(self, url, response):
+        """Return cached fields if `response` shows the page is unchanged, else None."""
+        entry = self.entry(url)
+        if not entry:
+            return None
+        if response.status_code == 304:
+            self.count("not_modified")
+            return entry["fields"]
+        if response.status_code == 200 and entry["sha256"] == content_hash(response.content):
+            self.remember(url, response, entry["fields"], count=False)
+            self.count("unchanged")
+            return entry["fields"]
+        return None
+
+    def remember(self, url, response, fields, count=True):
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "sha256": content_hash(response.content),
+            "field_names": self.fields,
+            "fields": fields,
+        }
+        with self.lock:
+            self.entries[url] = entry
+        if count:
+            self.count("parsed")
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def prune(self):
+        """Drop entries for pages not visited since the cache was loaded (courses no longer listed)."""
+        with self.lock:
+            stale = [url for url in self.entries if url not in self.visited]
+            for url in stale:
+                del self.entries[url]
+            self.stats["pruned"] += len(stale)
+        return len(stale)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.lock:
+            with open(self.path, "w") as f:
+                json.dump(self.entries, f)
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
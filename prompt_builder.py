@@ -0,0 +1,120 @@
+import logging
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a rough estimate when tiktoken isn't installed
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKEN_BUDGET = 1500
+MAX_HISTORY_TURNS = 4
+MIN_DESCRIPTION_WORDS = 15
+
+SYSTEM_PROMPT = ("You are a helpful Brown University academic advisor. Use the course data provided "
+                 "to recommend helpful courses. Be smart, kind, and specific, and give actionable "
+                 "recommendations based on the student's questions.")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def get_encoding():
+    """The gpt-3.5 tokenizer, or None if tiktoken or its vocabulary file is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # the vocabulary is downloaded on first use
+                logger.warning("tiktoken unavailable (%s); estimating prompt tokens", e)
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text, max_tokens):
+    """`text` cut to at most about `max_tokens` tokens, with "..." if anything was dropped."""
+    encoding = get_encoding()
+    if encoding is None:
+        return text if len(text) <= max_tokens * 4 else text[:max_tokens * 4] + "..."
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens]) + "..."
+
+
+def count_message_tokens(messages):
+    # Each chat message costs a few tokens of framing on top of its content
+    return sum(4 + count_tokens(message["content"]) for message in messages) + 2
+
+
+def compact_course(course, description_words=None):
+    """One line per course: code, title, instructor, meets and (possibly shortened) description."""
+    parts = [f"{course['code']} {course['title']}"]
+    for label, key in (("Instructor", "instructor"), ("Meets", "meets")):
+        if course.get(key) not in (None, "", "N/A"):
+            parts.append(f"{label}: {course[key]}")
+    description = course.get("description") or "N/A"
+    if description != "N/A" and description_words != 0:
+        words = description.split()
+        if description_words is not None and len(words) > description_words:
+            description = " ".join(words[:description_words]) + "..."
+        else:
+            description = " ".join(words)
+        parts.append(description)
+    return " | ".join(parts)
+
+
+def assemble(question, courses, turns, description_words, summary=""):
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append({"role": "system", "content": summary})
+    for entry in turns:
+        messages.append({"role": "user", "content": entry["question"]})
+        messages.append({"role": "assistant", "content": entry["response"]})
+    course_lines = "\n".join(compact_course(c, description_words) for c in courses)
+    messages.append({"role": "user", "content": f"COURSES:\n{course_lines}\n\nQUESTION:\n{question}"})
+    return messages
+
+
+def build_messages(question, courses, history, budget=PROMPT_TOKEN_BUDGET, max_turns=MAX_HISTORY_TURNS, summary=""):
+    """Build chat messages for the question that fit within `budget` tokens.
+
+    `summary` (from ConversationMemory) describes turns older than `history`.
+    Trims in priority order until the prompt fits: older history turns, then
+    course descriptions (halving their length), then the summary, then the most
+    recent turn, then the lowest-ranked courses. The system prompt and question
+    are always kept. Returns (messages, prompt token count).
+    """
+    turns = list(history)[-max_turns:] if max_turns else []
+    courses = list(courses)
+    description_words = None
+
+    while True:
+        messages = assemble(question, courses, turns, description_words, summary)
+        tokens = count_message_tokens(messages)
+        if tokens <= budget:
+            break
+        if len(turns) > 1:
+            turns.pop(0)
+        elif description_words is None:
+            description_words = 120
+        elif description_words > MIN_DESCRIPTION_WORDS:
+            description_words //= 2
+        elif summary:
+            summary = ""
+        elif turns:
+            turns.pop(0)
+        elif len(courses) > 1:
+            courses.pop()
+        else:
+            break
+
+    logger.info("prompt: %d tokens (%d courses, %d history turns, budget %d)",
+                tokens, len(courses), len(turns), budget)
+    return messages, tokens
@@ -1,86 +1,196 @@
-import json
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
-import subprocess
-import openai
+# First, so startup timings count from (nearly) process start
+from startup_timer import StartupTimer
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 
+import embed
+import embedding_backend
+import llm_client
+import prompt_builder
+from conversation_memory import ConversationMemory
+from course_filters import CourseFilters
+from course_store import load_courses
+from fast_path import FastPathRouter
+from lexical_index import CANDIDATES, LexicalIndex
+from query_cache import QUERY_CACHE_PATH, QueryCache, normalize_question
+from reranker import RERANK_MODEL, Reranker
+from tracing import Tracer, format_breakdown
+from response_cache import RESPONSE_CACHE_PATH, ResponseCache
 
+# sentence_transformers (torch) and openai take seconds to import; they load with the model, not here.
+# $EMBED_BACKEND=onnx-int8 switches query and course encoding to the quantized ONNX model.
+# $RERANK_MODEL=cross-encoder/... re-orders the top candidates with a cross-encoder.
+# $ADVISOR_TRACE=1 times every stage of each question (see tracing.py for the exports).
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
-if not openai.api_key:
-    print("❌ OPENAI_API_KEY is not set. Please export your API key, e.g.:\n   export OPENAI_API_KEY='sk-...'")
-    sys.exit(1)
+
+def require_api_key():
+    """Exit with a hint when OPENAI_API_KEY is missing."""
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ OPENAI_API_KEY is not set. Please export your API key, e.g.:\n   export OPENAI_API_KEY='sk-...'")
+        sys.exit(1)
 
 class BrownCourseAdvisor:
-    def __init__(self):
-        """Initialize the advisor with all necessary components loaded once."""
-        print("🤖 Initializing Brown Course Advisor...")
-        
-        # Load courses data
-        with open('data/courses.json', 'r') as f:
-            self.courses = json.load(f)
-        
-        # Check if embeddings need to be regenerated
-        with open('data/course_index.json', 'r') as f:
-            course_embeddings = json.load(f)
-        
-        if len(course_embeddings) != len(self.courses):
-            print("🔄 Reembedding courses...")
-            subprocess.run(["python", "embed.py"])
-            print("✅ Reembedding done.")
-        
-        # Load FAISS index and model (only once!)
-        print("📚 Loading course index...")
-        self.index = faiss.read_index('data/course_index.faiss')
-        
-        print("🧠 Loading AI model...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, query_cache_path=None, response_cache_path=None, background=False, on_status=None,
+                 tracer=None, startup=None):
+        """Initialize the advisor with all necessary components loaded once.
+
+        Pass `query_cache_path` to keep question embeddings across sessions and
+        `response_cache_path` to keep advisor answers on disk. With `background`,
+        the model and index warm up on a separate thread and questions asked in
+        the meantime wait for them; `on_status(message)` hears each loading step.
+        `startup` holds the timing breakdown (pass one to continue its timeline).
+        """
+        if startup is None:
+            startup = StartupTimer()
+            startup.mark("imports")
+        self.startup = startup
+        self.on_status = on_status
+        self.query_cache_path = query_cache_path
+        self.response_cache_path = response_cache_path
+        self.ready = threading.Event()
+        self.load_error = None
         
-        # Initialize conversation history
-        self.conversation_history = []
+        # Recent turns plus a running summary of older ones, bounded in size
+        self.conversation_history = ConversationMemory()
+        self.last_first_token = None
+        self.last_prompt_tokens = None
+        self.last_batch_timings = None
+        self.last_batch_errors = {}
+        self.tracer = tracer or Tracer()
+        self.last_trace = {}
         
-        print("✅ Brown Course Advisor ready! Type 'quit', 'exit', or 'bye' to end the session.\n")
->>>>>>> b3ce760 (new gui)
+        print("🤖 Initializing Brown Course Advisor...")
+        if background:
+            threading.Thread(target=self.load, kwargs={"verbose": False}, daemon=True).start()
+        else:
+            self.load()
+            if self.load_error:
+                raise self.load_error
+            print("✅ Brown Course Advisor ready! Type 'quit', 'exit', or 'bye' to end the session.\n")
     
-    def ask_chat(self, question, course_list, conversation_context=""):
-        """Enhanced chat function with conversation context."""
-        prompt = f"""You're an academic advisor at Brown University. Use the course data below to recommend helpful courses. Be smart, kind, and specific.
-        
-        {conversation_context}
-        
-        COURSES:
-        {json.dumps(course_list, indent=2)}
+    def load(self, verbose=True):
+        """Load courses, model, index and caches, timing each step; sets `ready` when done."""
+        say = self.on_status or (print if verbose else (lambda message: None))
+        try:
+            with self.startup.phase("courses"):
+                self.courses = load_courses()
+            
+            # Load model and FAISS index (only once!)
+            say("🧠 Loading AI model...")
+            with self.startup.phase("model"):
+                self.model = embedding_backend.load_model(embed.MODEL_NAME)
+            
+            # The manifest tells us if the index is stale; rebuild here with the loaded model
+            say("📚 Loading course index...")
+            with self.startup.phase("index"):
+                self.index = embed.load_index(self.courses, self.model,
+                                              on_rebuild=lambda: say("🔄 Reembedding courses..."))
+            with self.startup.phase("caches"):
+                self.query_cache = QueryCache(self.model, self.index, path=self.query_cache_path)
+                self.response_cache = ResponseCache(self.response_cache_path)
+                self.lexical_index = LexicalIndex(self.courses)
+                self.course_filters = CourseFilters(self.courses)
+                self.router = FastPathRouter(self.courses, self.lexical_index)
+            self.reranker = None
+            if RERANK_MODEL:
+                say("🔀 Loading re-ranker...")
+                with self.startup.phase("reranker"):
+                    self.reranker = Reranker(self.courses)
+                    self.reranker.warm_up()
+            with self.startup.phase("llm client"):
+                llm_client.warm_up()
+            self.startup.mark("ready")
+        except Exception as e:
+            self.load_error = e
+        finally:
+            self.ready.set()
+    
+    def wait_until_ready(self):
+        """Block until the background warm-up is done; raises if it failed."""
+        self.ready.wait()
+        if self.load_error:
+            raise RuntimeError(f"the advisor failed to start: {self.load_error}") from self.load_error
+    
+    def ask_chat(self, question, course_list, on_token=None, memory=None, vector=None):
+        """Enhanced chat function with conversation context.
 
-        QUESTION:
-        {question} 
+        Courses and recent history are packed into a token-budgeted prompt by
+        prompt_builder; `last_prompt_tokens` holds its size. With `on_token`,
+        the reply is streamed and `on_token` is called with each piece as it
+        arrives; `last_first_token` then holds the time to first token.
+        `memory` defaults to the session's conversation; `vector` skips
+        re-encoding the question.
         """
+        self.last_first_token = None
+        self.last_prompt_tokens = None
+        if memory is None:
+            memory = self.conversation_history
+        history, summary = memory.snapshot()
+        cached, request = self.prepare_chat(question, course_list, history, summary, vector)
+        if cached is not None:
+            return cached
         
-        messages = [
-            {"role": "system", "content": "You are a helpful Brown University academic advisor. Provide specific, actionable course recommendations based on the student's questions."}
-        ]
-        
-        # Add conversation history for context
-        for entry in self.conversation_history[-4:]:  # Keep last 4 exchanges for context
-            messages.append({"role": "user", "content": entry["question"]})
-            messages.append({"role": "assistant", "content": entry["response"]})
-        
-        messages.append({"role": "user", "content": prompt})
-        
+        self.last_prompt_tokens = request[3]
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
-            return response['choices'][0]['message']['content']
+            answer, self.last_first_token = self.complete_chat(request, on_token)
+            return answer
         except Exception as e:
             return f"Sorry, I encountered an error: {str(e)}. Please try again."
     
+    def prepare_chat(self, question, course_list, history=(), summary="", vector=None):
+        """First half of ask_chat: (cached answer, None), or (None, request) to send to the LLM.
+
+        Answers depend on the conversation so far, so only questions asked
+        without `history` or `summary` use the response cache. The request is
+        (messages, course ids, vector, prompt tokens), with vector None when the
+        answer must not be cached. The CLI, the GUI and the HTTP service all
+        start here.
+        """
+        course_ids = [course['code'] for course in course_list]
+        if history or summary:
+            vector = None
+        else:
+            if vector is None:
+                with self.tracer.span("encode"):
+                    vector = self.query_cache.encode(question)
+            # A near-identical question over the same courses was already answered
+            with self.tracer.span("cache"):
+                cached = self.response_cache.lookup(course_ids, vector)
+            if cached is not None:
+                return cached, None
+        
+        # Compact courses + recent history, trimmed to the prompt token budget
+        with self.tracer.span("prompt"):
+            messages, tokens = prompt_builder.build_messages(question, course_list, history, summary=summary)
+        return None, (messages, course_ids, vector, tokens)
+    
+    def complete_chat(self, request, on_token=None, cancel=None):
+        """Second half of ask_chat: send a prepared request to the LLM and cache the answer.
+
+        Returns (answer, seconds to the first token or None). Streams when
+        `on_token` is given; setting the `cancel` event stops further retries.
+        """
+        first_token = None
+        with self.tracer.span("llm"):
+            if on_token:
+                answer, first_token = llm_client.stream(request[0], on_token, cancel=cancel)
+            else:
+                answer = llm_client.complete(request[0])
+        self.remember_answer(request, answer)
+        return answer, first_token
+    
+    def remember_answer(self, request, answer):
+        """Cache the LLM's answer to a prepared request, if it was asked without conversation context."""
+        _, course_ids, vector, _ = request
+        if vector is not None:
+            with self.tracer.span("cache"):
+                self.response_cache.store(course_ids, vector, answer)
+    
     def display_info(self, course, question):
         """Display course information based on question keywords."""
         question = question.lower()
@@ -100,26 +210,167 @@ class BrownCourseAdvisor:
 
         return output
     
-    def ask_question(self, question: str, k=3):
-        """Process a question and return recommendations."""
-        try:
-            # Encode question
-            vector = self.model.encode(question)
-            _, indices = self.index.search(np.array([vector]), k)
+    def allowed_courses(self, question):
+        """Ids of the courses matching the question's level, instructor and meeting-time constraints.
+
+        None when the question has no constraints, or none that any course satisfies.
+        """
+        return self.course_filters.select(self.course_filters.parse(question)) or None
+    
+    def rank(self, question, dense_ids, k, allowed=None):
+        """Course ids for the question: dense + BM25 fused, then re-ranked when a re-ranker is loaded.
+
+        The re-ranker picks from the top `candidates` (30) of the same fused
+        list, so when it falls back the result is exactly the plain ranking.
+        """
+        if self.reranker is None:
+            with self.tracer.span("hybrid"):
+                return self.lexical_index.hybrid(question, dense_ids, k, allowed=allowed)
+        with self.tracer.span("hybrid"):
+            ranked = self.lexical_index.hybrid(question, dense_ids, self.reranker.candidates, allowed=allowed)
+        with self.tracer.span("rerank"):
+            return self.reranker.rerank(question, ranked, k, pinned=self.lexical_index.exact_matches(question))
+    
+    def retrieve(self, question, k=3):
+        """Return the k best courses for the question: dense + BM25 fused, exact codes first.
+
+        Level, instructor and meeting-time constraints in the question
+        ("1000-level courses on MWF") restrict both searches to matching courses.
+        """
+        with self.tracer.span("filters"):
+            allowed = self.allowed_courses(question)
+        with self.tracer.span("encode"):
+            vector = self.query_cache.encode(question)
+        with self.tracer.span("search"):
+            _, indices = self.query_cache.search(vector, CANDIDATES, allowed)
+        return [self.courses[i] for i in self.rank(question, indices[0], k, allowed)]
+    
+    def advise_many(self, questions, k=3, workers=4):
+        """Answer a batch of independent questions; returns [(advice, courses), ...] in order.
+
+        Questions the fast path can't answer are encoded in one batched
+        model.encode call and searched in one batched index.search (filtered
+        questions are searched one by one). Their LLM calls then run on up to
+        `workers` threads, without conversation history. Per-stage seconds are
+        left in `last_batch_timings`.
+
+        A question that fails gets an apology and no courses, like in
+        ask_question; `last_batch_errors` maps its position to the error.
+        """
+        self.wait_until_ready()
+        timings = {"fast_path": 0.0, "encode": 0.0, "search": 0.0, "llm": 0.0}
+        results = [None] * len(questions)
+        errors = {}
+        
+        def fail(i, e):
+            errors[i] = str(e)
+            results[i] = (f"Sorry, I encountered an error processing your question: {e}", [])
+        
+        start = time.perf_counter()
+        pending = []
+        for i, question in enumerate(questions):
+            try:
+                fast = self.router.route(question)
+            except Exception as e:
+                fail(i, e)
+                continue
+            if fast:
+                results[i] = fast
+            else:
+                pending.append(i)
+        timings["fast_path"] = time.perf_counter() - start
+        
+        if pending:
+            texts = [questions[i] for i in pending]
+            try:
+                vectors, course_lists = self.retrieve_many(texts, k, timings)
+            except Exception:
+                # One bad question fails the batched calls; retry them one at a time
+                vectors, course_lists = [None] * len(texts), [None] * len(texts)
+                for j, question in enumerate(texts):
+                    try:
+                        [vectors[j]], [course_lists[j]] = self.retrieve_many([question], k, timings)
+                    except Exception as e:
+                        fail(pending[j], e)
             
-            # Get relevant courses
-            course_list = [self.courses[i] for i in indices[0]]
+            # Repeats of a question over the same courses share one LLM call
+            def answer(j):
+                try:
+                    cached, request = self.prepare_chat(texts[j], course_lists[j], vector=vectors[j])
+                    return (cached, None) if cached is not None else (self.complete_chat(request)[0], None)
+                except Exception as e:
+                    return None, e
             
-            # Generate advice
-            conversation_context = "Previous conversation context: " + " ".join([f"Q: {entry['question']} A: {entry['response'][:100]}..." for entry in self.conversation_history[-2:]])
-            advice = self.ask_chat(question, course_list, conversation_context)
+            start = time.perf_counter()
+            first = {}
+            for j, question in enumerate(texts):
+                if course_lists[j] is not None:
+                    first.setdefault((normalize_question(question), tuple(c['code'] for c in course_lists[j])), j)
+            unique = list(first.values())
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                answers = dict(zip(unique, pool.map(answer, unique)))
+            for j, question in enumerate(texts):
+                if course_lists[j] is None:
+                    continue
+                advice, error = answers[first[(normalize_question(question), tuple(c['code'] for c in course_lists[j]))]]
+                if error:
+                    fail(pending[j], error)
+                else:
+                    results[pending[j]] = (advice, course_lists[j])
+            timings["llm"] = time.perf_counter() - start
+        
+        self.last_batch_timings = timings
+        self.last_batch_errors = errors
+        return results
+    
+    def retrieve_many(self, questions, k, timings):
+        """Batched retrieve(): ([one (1, dim) vector per question], [courses per question]).
+
+        Adds the encode and search seconds to `timings`.
+        """
+        start = time.perf_counter()
+        vectors = self.query_cache.encode_many(questions)
+        timings["encode"] += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        allowed = [self.allowed_courses(question) for question in questions]
+        dense = [None] * len(questions)
+        unfiltered = [j for j, ids in enumerate(allowed) if ids is None]
+        if unfiltered:
+            _, indices = self.query_cache.search_many(vectors[unfiltered], CANDIDATES)
+            for j, row in zip(unfiltered, indices):
+                dense[j] = row
+        for j, ids in enumerate(allowed):
+            if ids is not None:
+                dense[j] = self.query_cache.search(vectors[j:j + 1], CANDIDATES, ids)[1][0]
+        course_lists = [[self.courses[i] for i in self.rank(question, dense[j], k, allowed[j])]
+                        for j, question in enumerate(questions)]
+        timings["search"] += time.perf_counter() - start
+        return [vectors[j:j + 1] for j in range(len(questions))], course_lists
+    
+    def ask_question(self, question: str, k=3, on_token=None):
+        """Process a question and return recommendations."""
+        self.last_first_token = None
+        self.last_prompt_tokens = None
+        try:
+            self.wait_until_ready()
             
-            # Store in conversation history
-            self.conversation_history.append({
-                "question": question,
-                "response": advice,
-                "courses": course_list
-            })
+            with self.tracer.question() as self.last_trace:
+                # Factual questions about a named course are answered from its record
+                with self.tracer.span("fast_path"):
+                    fast = self.router.route(question)
+                if fast:
+                    advice, course_list = fast
+                else:
+                    # Get relevant courses
+                    course_list = self.retrieve(question, k)
+                    
+                    # Generate advice
+                    advice = self.ask_chat(question, course_list, on_token)
+                
+                # Store in conversation history (course codes only; old turns get summarized)
+                with self.tracer.span("memory"):
+                    self.conversation_history.add(question, advice, [course['code'] for course in course_list])
             
             return advice, course_list
             
@@ -131,6 +382,8 @@ class BrownCourseAdvisor:
         """Run the interactive question-answering session."""
         print("🎓 Welcome to the Brown Course Advisor!")
         print("Ask me anything about courses, prerequisites, schedules, or academic planning.\n")
+        self.startup.mark("prompt")
+        startup_reported = False
         
         while True:
             try:
@@ -146,15 +399,37 @@ class BrownCourseAdvisor:
                     print("Please enter a question or type 'quit' to exit.")
                     continue
                 
-                # Process the question
-                print("\n🤔 Thinking...")
-                advice, courses = self.ask_question(question)
+                # Questions asked during warm-up wait for the model and index
+                if not self.ready.is_set():
+                    print("\n⏳ Still warming up; your question is queued and will be answered as soon as the model is ready.")
                 
-                # Display results
+                # Process the question, printing the advice as it streams in
+                print("\n🤔 Thinking...")
                 print("\n" + "="*60)
                 print("🎯 AI Advisor Advice (Triple A)")
                 print("="*60)
-                print(advice)
+                
+                streamed = []
+                def show_token(token):
+                    streamed.append(token)
+                    print(token, end="", flush=True)
+                
+                advice, courses = self.ask_question(question, on_token=show_token)
+                
+                # Display results (cached answers and errors arrive all at once)
+                if streamed:
+                    print()
+                if advice != "".join(streamed):
+                    print(advice)
+                if self.last_first_token is not None:
+                    print(f"\n⏱️  First token after {self.last_first_token:.2f}s")
+                if self.last_prompt_tokens is not None:
+                    print(f"📝 Prompt: {self.last_prompt_tokens} tokens")
+                if self.last_trace:
+                    print(f"⏱️  {format_breakdown(self.last_trace)} (total {self.last_trace['total']:.2f}s)")
+                if not startup_reported and self.ready.is_set():
+                    startup_reported = True
+                    print(f"⏱️  Startup: {self.startup.summary()}")
                 
                 if courses:
                     print("\n📚 Relevant Courses Found:")
@@ -170,7 +445,31 @@ class BrownCourseAdvisor:
             except Exception as e:
                 print(f"\n❌ An unexpected error occurred: {str(e)}")
                 print("Please try again or type 'quit' to exit.\n")
+        
+        if not self.ready.is_set() or self.load_error:
+            return
+        self.tracer.close()
+        self.query_cache.save()
+        stats = self.query_cache.stats()["embeddings"]
+        print(f"🗂️  Question cache: {stats['hits']} hits, {stats['misses']} misses")
+        stats = self.response_cache.stats()
+        print(f"🗂️  Answer cache: {stats['hits']} hits, {stats['misses']} misses")
+        stats = self.router.stats()
+        print(f"⚡ Answered directly: {stats['fast']['count']} ({stats['fast']['fraction']:.0%}), "
+              f"via retrieval + LLM: {stats['llm']['count']} ({stats['llm']['fraction']:.0%})")
+        stats = llm_client.stats()
+        if stats['retries'] or stats['failures'] or stats['rejected']:
+            print(f"🔁 LLM: {stats['requests']} requests, {stats['retries']} retried, "
+                  f"{stats['failures']} failed, {stats['rejected']} rejected (breaker {stats['breaker']})")
+        if self.reranker:
+            stats = self.reranker.stats()
+            print(f"🔀 Re-ranked: {stats['reranked']} (top-3 changed for {stats['change_rate']:.0%}), "
+                  f"fell back: {stats['fallback']}, added {stats['added_ms_p50']:.0f}ms p50 / "
+                  f"{stats['added_ms_p99']:.0f}ms p99")
 
-# Initialize and run the advisor
-advisor = BrownCourseAdvisor()
-advisor.run_interactive_session()
\ No newline at end of file
+if __name__ == "__main__":
+    # Initialize and run the advisor
+    require_api_key()
+    advisor = BrownCourseAdvisor(query_cache_path=QUERY_CACHE_PATH, response_cache_path=RESPONSE_CACHE_PATH,
+                                 background=True)
+    advisor.run_interactive_session()
@@ -0,0 +1,132 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import embed
+from course_filters import filtered_search
+
+QUERY_CACHE_PATH = "data/query_cache.npz"
+
+
+class LRUCache:
+    """A bounded, thread-safe mapping that evicts the least recently used entry, counting hits and misses."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+def normalize_question(question):
+    """Case, whitespace and trailing punctuation don't change what is being asked."""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+
+class QueryCache:
+    """Caches question -> embedding and embedding -> FAISS top-k for one model and index.
+
+    Repeated questions skip the transformer forward pass entirely. With a
+    `path`, the question embeddings are kept across sessions (search results
+    are not, since they depend on the index loaded at the time).
+    """
+
+    def __init__(self, model, index, maxsize=1024, path=None, model_name=None):
+        self.model = model
+        self.index = index
+        self.model_name = model_name or embed.model_id(model)
+        self.path = path
+        self.vectors = LRUCache(maxsize)
+        self.results = LRUCache(maxsize)
+        if path:
+            self.load()
+
+    def encode(self, question):
+        key = normalize_question(question)
+        vector = self.vectors.get(key)
+        if vector is None:
+            vector = embed.encode_query(self.model, key)
+            self.vectors.put(key, vector)
+        return vector
+
+    def encode_many(self, questions):
+        """Embeddings for several questions; the uncached ones are encoded in one batch."""
+        keys = [normalize_question(question) for question in questions]
+        found = {}
+        for key in dict.fromkeys(keys):
+            vector = self.vectors.get(key)
+            if vector is not None:
+                found[key] = vector
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            for key, vector in zip(missing, embed.encode_queries(self.model, missing)):
+                found[key] = vector[None, :]
+                self.vectors.put(key, found[key])
+        return np.concatenate([found[key] for key in keys])
+
+    def search_many(self, vectors, k):
+        """Unfiltered FAISS top-k for a matrix of vectors in one index.search call."""
+        scores, indices = self.index.search(vectors, k)
+        for i, vector in enumerate(vectors):
+            self.results.put((vector.tobytes(), k, None), (scores[i:i + 1], indices[i:i + 1]))
+        return scores, indices
+
+    def search(self, vector, k, allowed=None):
+        """FAISS top-k for the vector, restricted to the `allowed` course ids if given."""
+        key = (vector.tobytes(), k, frozenset(allowed) if allowed else None)
+        result = self.results.get(key)
+        if result is None:
+            if allowed:
+                result = filtered_search(self.index, vector, k, allowed)
+            else:
+                result = self.index.search(vector, k)
+            self.results.put(key, result)
+        return result
+
+    def stats(self):
+        return {"embeddings": self.vectors.stats(), "search": self.results.stats()}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path, allow_pickle=False) as data:
+            if str(data["model"]) != self.model_name:
+                return
+            for question, vector in zip(data["questions"], data["vectors"]):
+                self.vectors.put(str(question), vector[None, :])
+
+    def save(self):
+        if not self.path or not len(self.vectors):
+            return
+        questions = list(self.vectors.entries)
+        vectors = np.concatenate([self.vectors.entries[q] for q in questions])
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        np.savez(self.path, model=np.array(self.model_name), questions=np.array(questions), vectors=vectors)
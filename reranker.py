@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import embed
+from query_cache import LRUCache, normalize_question
+
+# Off unless $RERANK_MODEL names a cross-encoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+# Hybrid candidates scored per question
+RERANK_CANDIDATES = 30
+
+
+class Reranker:
+    """Re-orders retrieval candidates with a small CPU cross-encoder, within a latency budget.
+
+    All uncached (question, course) pairs are scored in one batched predict
+    call, and scores are cached per normalized question and course. The cost
+    of one pair is measured as it runs; when scoring the uncached pairs would
+    take longer than `budget_ms`, the candidates keep their dense order.
+    """
+
+    def __init__(self, courses, model_name=RERANK_MODEL, budget_ms=RERANK_BUDGET_MS,
+                 candidates=RERANK_CANDIDATES, cache_size=20000, model=None):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, device="cpu", max_length=256)
+        self.model = model
+        self.courses = courses
+        self.budget_ms = budget_ms
+        self.candidates = candidates
+        self.scores = LRUCache(cache_size)
+        self.pair_ms = None
+        self.counts = {"reranked": 0, "fallback": 0, "changed": 0}
+        self.added_ms = deque(maxlen=1000)
+        self.lock = threading.Lock()
+
+    def warm_up(self):
+        """Load the weights and measure the cost of a pair with one full-size batch (not cached)."""
+        pairs = [("warm-up", embed.course_text(self.courses[i]))
+                 for i in range(min(self.candidates, len(self.courses)))]
+        self.predict(pairs)
+        self.predict(pairs)
+
+    def predict(self, pairs):
+        start = time.perf_counter()
+        scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        pair_ms = (time.perf_counter() - start) * 1000 / len(pairs)
+        with self.lock:
+            # Smoothed, so one slow batch doesn't switch re-ranking off
+            self.pair_ms = pair_ms if self.pair_ms is None else 0.8 * self.pair_ms + 0.2 * pair_ms
+        return np.asarray(scores, dtype=np.float32).ravel()
+
+    def rerank(self, question, ranked, k=3, pinned=()):
+        """The best k of `ranked` (course ids, best first) by cross-encoder score.
+
+        `pinned` ids, courses named by code in the question, stay in front.
+        Falls back to the first k of `ranked` when the budget would be exceeded.
+        """
+        start = time.perf_counter()
+        key = normalize_question(question)
+        pinned = [i for i in ranked if i in pinned]
+        rest = [i for i in ranked if i not in pinned][:self.candidates]
+        scores = {i: self.scores.get((key, i)) for i in rest}
+        missing = [i for i, score in scores.items() if score is None]
+
+        if missing and self.pair_ms is not None and len(missing) * self.pair_ms > self.budget_ms:
+            result, outcome = ranked[:k], "fallback"
+        else:
+            if missing:
+                pairs = [(question, embed.course_text(self.courses[i])) for i in missing]
+                for i, score in zip(missing, self.predict(pairs)):
+                    scores[i] = float(score)
+                    self.scores.put((key, i), float(score))
+            result = (pinned + sorted(rest, key=lambda i: -scores[i]))[:k]
+            outcome = "reranked"
+
+        with self.lock:
+            self.counts[outcome] += 1
+            if set(result) != set(ranked[:k]):
+                self.counts["changed"] += 1
+            self.added_ms.append((time.perf_counter() - start) * 1000)
+        return result
+
+    def stats(self):
+        """Counts, the share of questions whose top-k courses changed, and added latency in ms."""
+        with self.lock:
+            total = self.counts["reranked"] + self.counts["fallback"]
+            added = np.array(self.added_ms) if self.added_ms else np.zeros(1)
+            return dict(self.counts,
+                        change_rate=self.counts["changed"] / total if total else 0.0,
+                        added_ms_p50=float(np.percentile(added, 50)),
+                        added_ms_p99=float(np.percentile(added, 99)),
+                        pair_ms=self.pair_ms,
+                        score_cache=self.scores.stats())
@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+RESPONSE_CACHE_PATH = "data/response_cache.sqlite3"
+
+
+class ResponseCache:
+    """Semantic cache of advisor answers, kept in SQLite (on disk, or in memory without a path).
+
+    An answer is reused when the retrieved course set is the same and the new
+    question's embedding has cosine similarity >= `threshold` with a cached one.
+    Entries expire after `ttl` seconds; past `maxsize` the least recently used go.
+    The key says nothing about the conversation, so callers only use the cache
+    for questions asked without history.
+    """
+
+    def __init__(self, path=None, threshold=0.95, ttl=24 * 3600, maxsize=512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   id INTEGER PRIMARY KEY,
+                   course_key TEXT NOT NULL,
+                   vector BLOB NOT NULL,
+                   response TEXT NOT NULL,
+                   created REAL NOT NULL,
+                   last_used REAL NOT NULL)"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_course_key ON responses (course_key)")
+        self.db.commit()
+
+    @staticmethod
+    def course_key(course_ids):
+        return "|".join(sorted(course_ids))
+
+    def lookup(self, course_ids, vector):
+        """Return the cached answer closest to `vector` for this course set, or None."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        now = time.time()
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, vector, response FROM responses WHERE course_key = ? AND created >= ?",
+                (self.course_key(course_ids), now - self.ttl),
+            ).fetchall()
+            best_id, best_response, best_score = None, None, self.threshold
+            for row_id, blob, response in rows:
+                score = float(np.dot(np.frombuffer(blob, dtype=np.float32), vector))
+                if score >= best_score:
+                    best_id, best_response, best_score = row_id, response, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.db.execute("UPDATE responses SET last_used = ? WHERE id = ?", (now, best_id))
+            self.db.commit()
+            return best_response
+
+    def store(self, course_ids, vector, response):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO responses (course_key, vector, response, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.course_key(course_ids), vector.tobytes(), response, now, now),
+            )
+            self.db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self.db.execute(
+                "DELETE FROM responses WHERE id NOT IN "
+                "(SELECT id FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.maxsize,),
+            )
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            size = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {"size": size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
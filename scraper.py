@@ -1,16 +1,32 @@
+import argparse
+import importlib.util
+import itertools
 import json
 import os
 import requests
 from bs4 import BeautifulSoup
 import time
 
+from crawler import Crawler
+from page_cache import CACHE_PATH, PageCache
+
 BASE_URL = "https://cs.brown.edu"
 MAIN_URL = f"{BASE_URL}/courses/"
 OUTPUT_PATH = "data/courses.json"
 
-def get_main_courses():
-    response = requests.get(MAIN_URL)
-    soup = BeautifulSoup(response.text, "html.parser")
+# Course page table rows to extract: field name -> label in the first cell
+TABLE_LABELS = {
+    "instructor": "Instructor(s):",
+    "meets": "Meets:",
+}
+DETAIL_FIELDS = ("description",) + tuple(TABLE_LABELS)
+
+# lxml builds the tree several times faster than the pure-Python parser
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+def get_main_courses(session=None, base_url=BASE_URL):
+    response = (session or requests).get(f"{base_url}/courses/")
+    soup = BeautifulSoup(response.text, PARSER)
     courses = []
 
     for row in soup.find_all("tr"):
@@ -31,7 +47,7 @@ def get_main_courses():
         courseHM = {
             "code": course_code.text.strip(),
             "title" : title_cell.text.strip(),
-            "url": BASE_URL + relative_url
+            "url": base_url + relative_url
         }
 
         courses.append(courseHM)
@@ -57,18 +73,57 @@ def getDescription(soup):
 
     return "N/A"
 
-def scraping(course):
-    page = requests.get(course["url"])
-    secondSoup = BeautifulSoup(page.text, "html.parser")
+def extract_course_fields(html, labels=TABLE_LABELS):
+    """Single-pass replacement for getDescription() + one get_table_value() per label.
+
+    Walks the document once, stopping as soon as the description and every
+    label are found; returns the same values the separate functions would.
+    """
+    soup = BeautifulSoup(html, PARSER)
+    fields = {"description": "N/A"}
+    fields.update((field, "N/A") for field in labels)
+    pending = dict(labels)
+    need_description = True
+
+    for tag in soup.descendants:
+        if tag.name == "p" and need_description:
+            text = tag.text.strip()
+            if len(text) > 50:
+                fields["description"] = text
+                need_description = False
+        elif tag.name == "tr" and pending:
+            col = tag.find_all("td")
+            if len(col) >= 2:
+                header = col[0].text
+                for field, label in list(pending.items()):
+                    if label in header:
+                        fields[field] = col[1].text.strip()
+                        del pending[field]
+
+        if not need_description and not pending:
+            break
+
+    return fields
+
+def scraping(course, session=None, cache=None):
+    url = course["url"]
+    headers = cache.conditional_headers(url) if cache else None
+    page = (session or requests).get(url, headers=headers)
+
+    # Unchanged pages (304, or same body hash) reuse the fields parsed last run
+    cached = cache.lookup(url, page) if cache else None
+    if cached is not None:
+        course.update(cached)
+        return course
 
     try:
-        course["description"] = getDescription(secondSoup)
-        course["instructor"] = get_table_value("Instructor(s):", secondSoup)
-        course["meets"] = get_table_value("Meets:", secondSoup)
+        course.update(extract_course_fields(page.text))
     except Exception as e:
-        course["description"] = "N/A"
-        course["instructor"] = "N/A"
-        course["meets"] = "N/A"
+        for field in DETAIL_FIELDS:
+            course[field] = "N/A"
+
+    if cache and page.status_code == 200:
+        cache.remember(url, page, {field: course[field] for field in DETAIL_FIELDS})
 
     return course
 
@@ -77,17 +132,92 @@ def savingCoursesJson(courses, path = OUTPUT_PATH):
     with open(path, "w") as file:
         json.dump(courses, file, indent=2)
         print(f"Saved {len(courses)} courses to {path}")
-        
 
-if __name__ == "__main__":
-    print("Starting scrape...")
-    raw_courses = get_main_courses()
+def loadCoursesJson(path = OUTPUT_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as file:
+        return json.load(file)
+
+def diff_courses(old, new):
+    """Compare two course lists by URL; returns (added, changed, removed) course lists."""
+    old_by_url = {course["url"]: course for course in old}
+    new_by_url = {course["url"]: course for course in new}
+    added = [course for url, course in new_by_url.items() if url not in old_by_url]
+    changed = [course for url, course in new_by_url.items() if url in old_by_url and old_by_url[url] != course]
+    removed = [course for url, course in old_by_url.items() if url not in new_by_url]
+    return added, changed, removed
+
+
+def scrape_serially(raw_courses, delay=0.5, cache=None):
     all_courses = []
 
     for i, course in enumerate(raw_courses):
         print(f"Scraping ({i+1}/{len(raw_courses)}): {course['code']} - {course['title']}")
-        detailed = scraping(course)
+        detailed = scraping(course, cache=cache)
         all_courses.append(detailed)
-        time.sleep(0.5)
+        time.sleep(delay)
+
+    return all_courses
+
+def scrape_concurrently(raw_courses, crawler, cache=None):
+    done = itertools.count(1)
+
+    def scrape_one(course):
+        detailed = scraping(course, crawler, cache)
+        print(f"Scraped ({next(done)}/{len(raw_courses)}): {course['code']} - {course['title']}")
+        return detailed
+
+    # map() keeps the listing order, so the output matches the serial path
+    return crawler.map(scrape_one, raw_courses)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Brown CS course pages into courses.json")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="concurrent fetchers; 1 keeps the original serial crawl")
+    parser.add_argument("--rate", type=float, default=4.0,
+                        help="max requests per second per host in concurrent mode")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="retries for transient errors in concurrent mode")
+    parser.add_argument("--delay", type=float, default=0.5,
+                        help="pause between pages in serial mode")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--cache", default=CACHE_PATH,
+                        help="page cache used for conditional requests")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore the page cache and re-parse every page")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("Starting scrape...")
+    start = time.perf_counter()
+    previous = loadCoursesJson(args.output)
+    cache = None if args.no_cache else PageCache(args.cache, DETAIL_FIELDS)
+
+    if args.workers > 1:
+        crawler = Crawler(workers=args.workers, rate=args.rate, retries=args.retries)
+        try:
+            raw_courses = get_main_courses(crawler, args.base_url)
+            all_courses = scrape_concurrently(raw_courses, crawler, cache)
+        finally:
+            crawler.close()
+    else:
+        raw_courses = get_main_courses(base_url=args.base_url)
+        all_courses = scrape_serially(raw_courses, args.delay, cache)
+
+    print(f"Scraped {len(all_courses)} courses in {time.perf_counter() - start:.1f}s")
+    if cache:
+        cache.prune()
+        cache.save()
+        print("Pages: {parsed} parsed, {not_modified} not modified, {unchanged} unchanged, "
+              "{pruned} dropped from the cache".format(**cache.stats))
+
+    added, changed, removed = diff_courses(previous, all_courses)
+    print(f"Courses: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+    savingCoursesJson(all_courses, args.output)
+    return all_courses
 
-    savingCoursesJson(all_courses)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
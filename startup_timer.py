@@ -0,0 +1,32 @@
+import time
+from contextlib import contextmanager
+
+# Imported first by query.py and gui_app.py, so this is close to process start
+PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """Wall-clock startup breakdown: milestones since process start plus named phase durations."""
+
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.milestones = {}
+        self.phases = {}
+
+    def mark(self, name):
+        """Record that `name` (e.g. "window", "ready") happened now."""
+        self.milestones[name] = time.perf_counter() - self.start
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - begin
+
+    def summary(self):
+        """e.g. "prompt at 0.31s, ready at 3.52s (model 3.05s, index 0.12s, ...)"."""
+        milestones = ", ".join(f"{name} at {seconds:.2f}s" for name, seconds in self.milestones.items())
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        return f"{milestones} ({phases})" if phases else milestones
@@ -0,0 +1,171 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# $ADVISOR_TRACE=1 turns tracing on in the CLI and the HTTP service (the GUI always traces);
+# $ADVISOR_TRACE_LOG appends one JSON line per question, $ADVISOR_METRICS keeps a Prometheus text file
+TRACING = os.getenv("ADVISOR_TRACE", "").lower() not in ("", "0", "false", "off")
+TRACE_LOG_PATH = os.getenv("ADVISOR_TRACE_LOG")
+METRICS_PATH = os.getenv("ADVISOR_METRICS")
+# Histogram bucket upper bounds in seconds, Prometheus style
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# The Prometheus file is rewritten at most this often (and on close)
+METRICS_INTERVAL = 10.0
+
+DISABLED = nullcontext()
+
+
+class Histogram:
+    """Counts per bucket plus sum and count, for one stage."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self):
+        return {"count": self.count, "sum": self.sum, "mean": self.sum / self.count if self.count else 0.0,
+                "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts))}
+
+
+class Tracer:
+    """Per-stage timing spans, aggregated into histograms and a per-question breakdown.
+
+    `span(name)` times a block and adds it to the histogram for `name` and, if
+    the thread is inside `question()`, to that question's breakdown. Disabled,
+    `span` returns a shared no-op context and nothing is recorded.
+
+    A question whose stages run on several threads or on an event loop (the
+    HTTP service) passes its own breakdown dict instead: to `span` on the
+    loop, to `collect` on a worker thread, and finally to `finish`.
+    """
+
+    def __init__(self, enabled=TRACING, log_path=TRACE_LOG_PATH, metrics_path=METRICS_PATH, buckets=BUCKETS):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self.buckets = buckets
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.metrics_written = 0.0
+
+    def span(self, name, breakdown=None):
+        if not self.enabled:
+            return DISABLED
+        return self.timed(name, breakdown)
+
+    @contextmanager
+    def timed(self, name, breakdown=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, breakdown)
+
+    def record(self, name, seconds, breakdown=None):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        if breakdown is None:
+            breakdown = getattr(self.local, "breakdown", None)
+        if breakdown is not None:
+            breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+    @contextmanager
+    def question(self):
+        """Collect the spans of one question on this thread; yields its {stage: seconds} breakdown.
+
+        On exit the breakdown gets a "total", is logged as a JSON line and the
+        Prometheus file is refreshed. Yields an empty dict when disabled.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        breakdown = self.local.breakdown = {}
+        start = time.perf_counter()
+        try:
+            yield breakdown
+        finally:
+            self.local.breakdown = None
+            self.finish(breakdown, time.perf_counter() - start)
+
+    @contextmanager
+    def collect(self, breakdown):
+        """Add the spans of this thread to `breakdown` for the duration of the block."""
+        previous = getattr(self.local, "breakdown", None)
+        self.local.breakdown = breakdown
+        try:
+            yield breakdown
+        finally:
+            self.local.breakdown = previous
+
+    def finish(self, breakdown, total):
+        """Close a question: record and add its total, log it, refresh the Prometheus file."""
+        if not self.enabled:
+            return
+        self.record("total", total)
+        breakdown["total"] = total
+        self.log(breakdown)
+        if self.metrics_path and time.monotonic() - self.metrics_written > METRICS_INTERVAL:
+            self.write_prometheus()
+
+    def log(self, breakdown):
+        if not self.log_path:
+            return
+        line = json.dumps({"time": time.time(), "stages": {k: round(v, 6) for k, v in breakdown.items()}})
+        with self.lock, open(self.log_path, "a") as f:
+            f.write(line + "\n")
+
+    def snapshot(self):
+        """{stage: {count, sum, mean, buckets}} over everything recorded so far."""
+        with self.lock:
+            return {name: histogram.snapshot() for name, histogram in self.histograms.items()}
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def prometheus(self):
+        """The histograms in the Prometheus text exposition format."""
+        lines = ["# HELP advisor_stage_seconds Time spent in each stage of answering a question.",
+                 "# TYPE advisor_stage_seconds histogram"]
+        for name, stats in self.snapshot().items():
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'advisor_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'advisor_stage_seconds_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'advisor_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Write the metrics file atomically (for node_exporter's textfile collector)."""
+        path = path or self.metrics_path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+        self.metrics_written = time.monotonic()
+
+    def close(self):
+        if self.enabled and self.metrics_path:
+            self.write_prometheus()
+
+
+def format_breakdown(breakdown, limit=5):
+    """e.g. "llm 0.84s · encode 12ms · search 1ms": the slowest stages first, total left out."""
+    stages = sorted(((k, v) for k, v in breakdown.items() if k != "total"), key=lambda item: -item[1])
+    return " · ".join(f"{name} {seconds:.2f}s" if seconds >= 0.1 else f"{name} {seconds * 1000:.0f}ms"
+                      for name, seconds in stages[:limit])